@@ -0,0 +1,20 @@
+# agents/amounts.py
+import re
+
+# First number in the text, with optional Indian-notation unit: "Rs. 2,000/-", "1.5 Lakh", "2 Cr".
+NUMBER_RE = re.compile(r"(\d[\d,]*(?:\.\d+)?)(?:\s*(lakhs?|lacs?|crores?|cr)\b)?", re.IGNORECASE)
+UNIT_MULTIPLIERS = {"lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "lacs": 1e5,
+                    "crore": 1e7, "crores": 1e7, "cr": 1e7}
+
+
+def parse_amount(text):
+    """Rupee amount of the first number in `text` (units applied), or None if there is none."""
+    match = NUMBER_RE.search(str(text))
+    if not match:
+        return None
+    try:
+        value = float(match.group(1).replace(",", ""))
+    except ValueError:  # e.g. "1,2.3.4" after comma removal
+        return None
+    unit = match.group(2)
+    return value * UNIT_MULTIPLIERS[unit.lower()] if unit else value
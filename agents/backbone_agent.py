@@ -1,33 +1,147 @@
 # agents/backbone_agent.py
-import logging
-from .scrapper_agent import ScraperAgent
-from .parser_agent import ParserAgent
-from .technical_agent import TechnicalAgent
-from .pricing_agent import PricingAgent
-from .report_agent import ReportAgent
+import logging, os, threading
+from collections import OrderedDict
+from dataclasses import replace
+from .pipeline import Pipeline, Stage
 
 logger = logging.getLogger(__name__)
 
+# Threads per stage: I/O-bound download wide, OCR per core, one vectorized matcher.
+DEFAULT_CONCURRENCY = {
+    "download": 16,
+    "ocr": os.cpu_count() or 1,
+    "parse": 2,
+    "match": 1,
+    "price": 1,
+    "report": 2,
+}
+REUSE_LIMIT = 1024  # match results kept in memory for duplicates arriving later
+
 class BackboneAgent:
-    def __init__(self, sku_csv="data/products.csv", price_csv="data/pricing.csv"):
+    """
+    Streams every RFP through download → OCR → parse → match → price → report.
+    Stages run concurrently, connected by bounded queues, so the first proposal
+    is written while the crawl is still going and a fast scraper can't fill memory.
+    With a DocRegistry, a document seen before (same bytes, or a near-duplicate such as
+    a corrigendum) skips OCR, extraction and matching and reuses the first copy's results.
+    """
+
+    def __init__(self, sku_csv="data/products.csv", rfp_dir="data/rfps", out_dir="data/output",
+                 margin_pct=10, concurrency=None, queue_size=8, cache=None, registry=None, matcher=None):
+        # Each agent brings its own heavy stack (browser, OCR, fuzzy matching), so import on use.
+        from .scrapper_agent import ScraperAgent
+        from .ocr_agent import OcrAgent
+        from .parser_agent import ParserAgent
+        from .matcher_service import MatcherService
+        from .report_agent import ReportAgent
+
         self.scraper = ScraperAgent()
-        self.parser = ParserAgent()
-        self.tech = TechnicalAgent(sku_csv)
-        self.pricing = PricingAgent(price_csv)
-        self.report = ReportAgent()
+        self.ocr = OcrAgent(input_dir=rfp_dir, cache=cache)
+        self.parser = ParserAgent(input_dir=rfp_dir, cache=cache, registry=registry)
+        # Pass one MatcherService to several BackboneAgents to keep a single resident catalogue.
+        self.matcher = matcher or MatcherService(sku_csv)
+        self.report = ReportAgent(out_dir)
+        self.rfp_dir = rfp_dir
+        self.margin_pct = margin_pct
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.queue_size = queue_size
+        self.registry = registry
+        self._matches = OrderedDict()  # original path -> matches frame
+        self._matches_lock = threading.Lock()
+        os.makedirs(out_dir, exist_ok=True)
 
     def run_pipeline(self, portal_urls):
-        scraped = self.scraper.run(portal_urls)
-        outputs = []
-        for r in scraped['payload']:
-            try:
-                parsed = self.parser.run(pdf_url=r['pdf_url'])
-                specs = parsed['payload']['spec_sections']
-                matches = self.tech.run(specs)
-                priced = self.pricing.run([m for m in matches['payload']])
-                report = self.report.run(priced['payload'], rfp_meta={"title": r.get("title"), "due_date": parsed['payload'].get("due_date")}, company_meta={})
-                outputs.append({"rfp": r, "report": report})
-            except Exception as e:
-                logger.exception("Failed pipeline for %s", r.get('pdf_url'))
-                outputs.append({"rfp": r, "error": str(e)})
-        return outputs
+        return list(self.iter_pipeline(portal_urls))
+
+    def iter_pipeline(self, portal_urls):
+        """Yield {"rfp", "report"} or {"rfp", "error"} for each RFP as soon as it finishes."""
+        from .scraper_agent_playwright import PlaywrightDownloader
+
+        if isinstance(portal_urls, str):
+            portal_urls = [portal_urls]
+        downloader = PlaywrightDownloader(out_dir=self.rfp_dir, ocr=False, registry=self.registry,
+                                          concurrency=self.concurrency["download"]).start()
+        stages = [
+            Stage("download", lambda s: self._download(downloader, s), self.concurrency["download"]),
+            Stage("ocr", self._ocr, self.concurrency["ocr"]),
+            Stage("parse", self._parse, self.concurrency["parse"]),
+            Stage("match", self._match, self.concurrency["match"]),
+            Stage("price", self._price, self.concurrency["price"]),
+            Stage("report", self._report, self.concurrency["report"]),
+        ]
+        try:
+            for out in Pipeline(stages, maxsize=self.queue_size).run(self._rfps(portal_urls)):
+                if "error" in out:
+                    logger.error("Failed pipeline for %s: %s", out["source"].get("pdf_url"), out["error"])
+                    yield {"rfp": out["source"], "error": out["error"]}
+                else:
+                    yield {"rfp": out["source"], "report": out["value"]["report"]}
+        finally:
+            downloader.stop()
+            self.ocr.close()
+
+    def _rfps(self, portal_urls):
+        for url in portal_urls:
+            yield from self.scraper.iter_rfps(url)
+
+    def _download(self, downloader, rfp):
+        path = downloader.fetch(rfp["pdf_url"])
+        if not path:
+            raise RuntimeError(f"download failed for {rfp['pdf_url']}")
+        return {"rfp": rfp, "path": path}
+
+    def _ocr(self, state):
+        first = self.parser.duplicate_of(state["path"])
+        with self._matches_lock:
+            seen = state["path"] in self._matches  # same bytes from another URL
+        if first is not None or seen:
+            logger.info("Duplicate of %s: %s", first or state["path"], state["rfp"].get("pdf_url"))
+            return {**state, "first_copy": first or state["path"]}
+        if not self.ocr.has_text(state["path"]) and not self.ocr.run_ocr(state["path"]):
+            raise RuntimeError(f"OCR failed for {state['path']}")
+        return state
+
+    def _parse(self, state):
+        # For scans this reads the OCR sidecar written by the previous stage.
+        # A duplicate reads the first copy's fields, which the extraction cache already holds.
+        source = state.get("first_copy") or state["path"]
+        fields = replace(self.parser.extract_fields(source), file=os.path.basename(state["path"]))
+        text = fields.spec_text or self.parser.extract_text(source)
+        return {**state, "fields": fields, "text": text}
+
+    def _match(self, state):
+        name = os.path.basename(state["path"])
+        first = state.get("first_copy")
+        if first is not None:
+            with self._matches_lock:
+                matches = self._matches.get(first)
+            if matches is not None:
+                return {**state, "matches": matches.assign(Tender_File=name)}
+        matches = self.matcher.match(name, state["text"])
+        if first is None:
+            with self._matches_lock:
+                self._matches[state["path"]] = matches
+                while len(self._matches) > REUSE_LIMIT:
+                    self._matches.popitem(last=False)
+        return {**state, "matches": matches}
+
+    def _price(self, state):
+        import pandas as pd
+        from .pricing_agent import price_matches
+
+        fields = state["fields"]
+        parsed = pd.DataFrame([{"Filename": fields.file, "Tender_Fee": fields.tender_fee, "EMD": fields.emd}])
+        return {**state, "priced": price_matches(state["matches"], parsed, margin_pct=self.margin_pct)}
+
+    def _report(self, state):
+        items = state["priced"].to_dict("records")
+        summary = {
+            "Items": len(items),
+            "Total_Estimate": float(state["priced"]["Total_Estimate"].sum()) if items else 0.0,
+        }
+        rfp = state["rfp"]
+        report = self.report.run({"items": items, "summary": summary},
+                                 rfp_meta={"title": rfp.get("title"), "due_date": state["fields"].bid_due_date},
+                                 company_meta={},
+                                 out_basename=os.path.splitext(os.path.basename(state["path"]))[0])
+        return {**state, "report": report}
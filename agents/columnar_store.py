@@ -0,0 +1,161 @@
+# agents/columnar_store.py
+import glob
+import os
+import time
+import uuid
+from datetime import date
+
+import pandas as pd
+
+from .amounts import parse_amount
+
+# Declared column types of tables with a fixed layout. Every part is written with the
+# full schema (missing columns as nulls), so parts from older layouts - such as a
+# migrated two-column parsed_rfps.csv - never narrow or conflict with later ones.
+TABLE_COLUMNS = {
+    "parsed_rfps": [("Filename", "string"), ("Extracted_Text", "string"), ("Tender_Fee", "float64"),
+                    ("EMD", "float64"), ("Bid_Due_Date", "string"), ("Opening_Date", "string"),
+                    ("Spec_Text", "string"), ("Duplicate_Of", "string")],
+}
+
+
+def _arrow():
+    # pyarrow is only needed once a store is actually read or written.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    return pa, pq
+
+
+def table_schema(table):
+    """Declared pyarrow schema of `table`, or None if its columns vary (matches, priced)."""
+    if table not in TABLE_COLUMNS:
+        return None
+    pa, _ = _arrow()
+    return pa.schema([(name, pa.type_for_alias(kind)) for name, kind in TABLE_COLUMNS[table]])
+
+
+def _unify(schemas):
+    pa, _ = _arrow()
+    try:
+        # Also widens e.g. int64 -> double between parts written with different data.
+        return pa.unify_schemas(schemas, promote_options="permissive")
+    except TypeError:  # pyarrow < 14: only null columns are promoted
+        return pa.unify_schemas(schemas)
+
+
+class TenderStore:
+    """
+    Columnar hand-off store between stages (Parquet), replacing the CSV files.
+    - One directory per table, partitioned by crawl date: <root>/<table>/crawl_date=YYYY-MM-DD/
+    - append() writes a new part file, so existing data is never rewritten
+    - read() loads only the requested columns, memory-mapping the files
+    - Tables in TABLE_COLUMNS are written with their declared schema; reads use the
+      schema unified over all parts, so a column missing from old parts reads as null
+    """
+
+    def __init__(self, root="data/store"):
+        self.root = root
+
+    def table_dir(self, table):
+        return os.path.join(self.root, table)
+
+    def exists(self, table):
+        return bool(glob.glob(os.path.join(self.table_dir(table), "crawl_date=*", "*.parquet")))
+
+    def append(self, table, df, crawl_date=None):
+        """Append `df` to `table` under `crawl_date` (default: today). Returns the part file path."""
+        crawl_date = str(crawl_date or date.today().isoformat())
+        part_dir = os.path.join(self.table_dir(table), f"crawl_date={crawl_date}")
+        os.makedirs(part_dir, exist_ok=True)
+        pa, pq = _arrow()
+        # Time-prefixed names keep parts in write order when listed.
+        path = os.path.join(part_dir, f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet")
+        pq.write_table(self._to_arrow(table, df), path)
+        return path
+
+    def _to_arrow(self, table, df):
+        pa, _ = _arrow()
+        declared = table_schema(table)
+        if declared is None:
+            return pa.Table.from_pandas(df, preserve_index=False)
+        df = df.copy()
+        for name, kind in TABLE_COLUMNS[table]:
+            if name not in df.columns:
+                df[name] = None
+            elif kind == "float64" and not pd.api.types.is_numeric_dtype(df[name]):
+                # Amounts from older writers may be text such as "Rs. 2,000/-".
+                df[name] = df[name].map(lambda v: parse_amount(v) if isinstance(v, str) else v)
+            elif kind == "string" and not pd.api.types.is_string_dtype(df[name]):
+                # e.g. an all-empty CSV column, read back as float NaN
+                df[name] = df[name].map(lambda v: None if pd.isna(v) else str(v))
+        # Columns beyond the declared ones keep their inferred types.
+        extra = [c for c in df.columns if c not in declared.names]
+        schema = pa.unify_schemas([declared, pa.Schema.from_pandas(df[extra], preserve_index=False)]) \
+            if extra else declared
+        return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+    def replace(self, table, df, crawl_date=None):
+        """Write `df` as the only part of the `crawl_date` partition (for steps that recompute it whole)."""
+        path = self.append(table, df, crawl_date=crawl_date)
+        for old in glob.glob(os.path.join(os.path.dirname(path), "*.parquet")):
+            if old != path:
+                os.remove(old)
+        return path
+
+    def read(self, table, columns=None, crawl_date=None, dedupe_on=None):
+        """
+        Read `table` as a DataFrame.
+        - columns: project only these columns (others are never loaded)
+        - crawl_date: a single partition, or None for all of them
+        - dedupe_on: keep only the most recently appended row per key
+        """
+        if not self.exists(table):
+            raise FileNotFoundError(f"❌ Missing table {table} in {self.root}")
+        _, pq = _arrow()
+        filters = [("crawl_date", "=", str(crawl_date))] if crawl_date else None
+        schema = self.schema(table)
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(list(columns) + ([dedupe_on] if dedupe_on else [])))
+            read_columns = [c for c in read_columns if c in schema.names]
+        data = pq.read_table(self.table_dir(table), columns=read_columns, filters=filters, schema=schema,
+                             memory_map=True, partitioning="hive")
+        df = data.to_pandas()
+        if dedupe_on:
+            df = df.drop_duplicates(dedupe_on, keep="last").reset_index(drop=True)
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+
+    def schema(self, table):
+        """Schema unified over every part of `table` (and its declared schema), plus crawl_date."""
+        pa, pq = _arrow()
+        parts = sorted(glob.glob(os.path.join(self.table_dir(table), "crawl_date=*", "*.parquet")))
+        schemas = [pq.read_schema(part, memory_map=True) for part in parts]
+        declared = table_schema(table)
+        if declared is not None:
+            schemas.insert(0, declared)
+        schema = _unify(schemas)
+        if "crawl_date" in schema.names:
+            schema = schema.remove(schema.get_field_index("crawl_date"))
+        return schema.append(pa.field("crawl_date", pa.string()))
+
+    def migrate_csv(self, csv_path, table, crawl_date=None):
+        """Import a legacy CSV hand-off file into `table`, conformed to its declared schema."""
+        df = pd.read_csv(csv_path)
+        return self.append(table, df, crawl_date=crawl_date)
+
+
+def read_frame(source, table=None, columns=None, crawl_date=None, dedupe_on=None):
+    """
+    Reader shim: `source` is either a TenderStore (read `table` from it) or a
+    legacy CSV path, read with the same column projection.
+    """
+    if isinstance(source, TenderStore):
+        return source.read(table, columns=columns, crawl_date=crawl_date, dedupe_on=dedupe_on)
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"❌ Missing {os.path.basename(source)}")
+    wanted = None if columns is None else set(columns)
+    usecols = None if wanted is None else (lambda c: c in wanted)
+    return pd.read_csv(source, usecols=usecols)
@@ -0,0 +1,104 @@
+# agents/crawl_engine.py
+import asyncio, logging, random, time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncCrawler:
+    """
+    Polite asyncio fetcher:
+    - Token-bucket rate limit per host instead of fixed sleeps
+    - Global cap of `concurrency` requests in flight
+    - Keep-alive connection pool shared by all requests
+    - Retries with exponential backoff on network errors, 429 and 5xx
+    """
+
+    def __init__(self, headers=None, rate_per_host=0.5, burst=1, concurrency=8,
+                 retries=3, backoff=1.0, timeout=25, session=None):
+        self.headers = headers or {}
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._buckets = defaultdict(lambda: TokenBucket(self.rate_per_host, self.burst))
+        self._slots = None
+
+    async def fetch(self, url, headers=None, method="GET"):
+        """Return the `requests.Response` for `url`, or None after exhausting retries."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        bucket = self._buckets[urlparse(url).netloc]
+        request_headers = {**self.headers, **(headers or {})}
+
+        for attempt in range(self.retries + 1):
+            await bucket.acquire()
+            async with self._slots:
+                try:
+                    r = await asyncio.to_thread(self.session.request, method, url,
+                                                headers=request_headers, timeout=self.timeout)
+                except requests.RequestException as e:
+                    logger.warning(f"Error fetching {url}: {e}")
+                    r = None
+            if r is not None:
+                metrics.count("requests", 1, stage="crawl", doc=url)
+                metrics.count("bytes_downloaded", len(r.content), stage="crawl", doc=url)
+            if r is not None and r.status_code not in RETRY_STATUSES:
+                return r
+            if attempt == self.retries:
+                break
+            delay = self.backoff * (2 ** attempt) * random.uniform(1.0, 1.5)
+            if r is not None and r.headers.get("Retry-After", "").isdigit():
+                delay = max(delay, int(r.headers["Retry-After"]))
+            await asyncio.sleep(delay)
+        logger.warning(f"Giving up on {url}")
+        return None
+
+    async def get_text(self, url):
+        """Body of `url`, or "" when it is blocked, missing or unreachable."""
+        r = await self.fetch(url)
+        if r is None:
+            return ""
+        if r.status_code in (403, 404):
+            logger.warning(f"Blocked or missing: {url} ({r.status_code})")
+            return ""
+        return r.text
+
+    def close(self):
+        self.session.close()
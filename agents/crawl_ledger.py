@@ -0,0 +1,143 @@
+# agents/crawl_ledger.py
+import os
+import sqlite3
+import time
+
+
+class CrawlLedger:
+    """
+    Persistent record of what earlier crawls have seen (SQLite):
+    - Tender detail pages: validators, content hash, first/last seen, processed flag
+    - PDF links: owning tender, validators, content hash, first/last seen, processed flag
+    Used to send conditional requests and emit only new or changed RFPs.
+    A PDF counts as processed only once the downstream steps report it through
+    mark_pdf_processed(); a tender is processed once all of its PDFs are, so an
+    interrupted or failed run is picked up again by the next crawl.
+    """
+
+    def __init__(self, path="data/crawl_ledger.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                processed INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS pdfs (
+                url TEXT PRIMARY KEY,
+                tender_url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                processed INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        # Ledgers written before PDFs had a processed flag.
+        pdf_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pdfs)")}
+        if "processed" not in pdf_columns:
+            self.conn.execute("ALTER TABLE pdfs ADD COLUMN processed INTEGER NOT NULL DEFAULT 0")
+        self.conn.commit()
+
+    def _get(self, table, url):
+        row = self.conn.execute(
+            f"SELECT etag, last_modified, content_hash FROM {table} WHERE url = ?", (url,)).fetchone()
+        return None if row is None else dict(zip(("etag", "last_modified", "content_hash"), row))
+
+    def conditional_headers(self, url, table="pages"):
+        """If-None-Match / If-Modified-Since headers for a previously seen URL."""
+        seen = self._get(table, url)
+        headers = {}
+        if seen and seen["etag"]:
+            headers["If-None-Match"] = seen["etag"]
+        if seen and seen["last_modified"]:
+            headers["If-Modified-Since"] = seen["last_modified"]
+        return headers
+
+    def is_processed(self, url):
+        row = self.conn.execute("SELECT processed FROM pages WHERE url = ?", (url,)).fetchone()
+        return bool(row and row[0])
+
+    def touch(self, url, table="pages"):
+        """Mark a URL as seen now without changing anything else (e.g. after a 304)."""
+        self.conn.execute(f"UPDATE {table} SET last_seen = ? WHERE url = ?", (time.time(), url))
+        self.conn.commit()
+
+    def record_page(self, url, etag=None, last_modified=None, content_hash=None):
+        """Upsert a detail page; returns True if it is new or its content hash changed."""
+        return self._record("pages", url, etag, last_modified, content_hash)
+
+    def mark_processed(self, url, processed=True):
+        self.conn.execute("UPDATE pages SET processed = ? WHERE url = ?", (int(processed), url))
+        self.conn.commit()
+
+    def has_pdf(self, url):
+        return self._get("pdfs", url) is not None
+
+    def is_pdf_processed(self, url):
+        row = self.conn.execute("SELECT processed FROM pdfs WHERE url = ?", (url,)).fetchone()
+        return bool(row and row[0])
+
+    def mark_pdf_processed(self, url=None, content_hash=None):
+        """
+        Downstream hook: call once a PDF has been downloaded, OCR'd and parsed.
+        Pass its URL, or the content hash recorded at download time (marks every URL
+        serving those bytes). Tenders whose PDFs are now all processed are marked
+        processed too; returns their URLs.
+        """
+        where, key = ("url = ?", url) if url is not None else ("content_hash = ?", content_hash)
+        tenders = [t for (t,) in self.conn.execute(
+            f"SELECT DISTINCT tender_url FROM pdfs WHERE {where}", (key,)) if t]
+        self.conn.execute(f"UPDATE pdfs SET processed = 1 WHERE {where}", (key,))
+        completed = []
+        for tender_url in tenders:
+            (pending,) = self.conn.execute(
+                "SELECT count(*) FROM pdfs WHERE tender_url = ? AND processed = 0", (tender_url,)).fetchone()
+            if not pending:
+                self.conn.execute("UPDATE pages SET processed = 1 WHERE url = ?", (tender_url,))
+                completed.append(tender_url)
+        self.conn.commit()
+        return completed
+
+    def record_pdf(self, url, tender_url=None, etag=None, last_modified=None, content_hash=None):
+        """
+        Upsert a PDF link; returns True if it is new or any known validator/hash changed.
+        Fields passed as None keep their stored value. A changed PDF must be processed again.
+        """
+        changed = self._record("pdfs", url, etag, last_modified, content_hash)
+        if tender_url is not None:
+            self.conn.execute("UPDATE pdfs SET tender_url = ? WHERE url = ?", (tender_url, url))
+        if changed:
+            self.conn.execute("UPDATE pdfs SET processed = 0 WHERE url = ?", (url,))
+        self.conn.commit()
+        return changed
+
+    def _record(self, table, url, etag, last_modified, content_hash):
+        now = time.time()
+        seen = self._get(table, url)
+        if seen is None:
+            self.conn.execute(
+                f"INSERT INTO {table} (url, etag, last_modified, content_hash, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (url, etag, last_modified, content_hash, now, now))
+            self.conn.commit()
+            return True
+
+        new = {"etag": etag, "last_modified": last_modified, "content_hash": content_hash}
+        changed = any(value is not None and seen[name] is not None and value != seen[name]
+                      for name, value in new.items())
+        self.conn.execute(
+            f"UPDATE {table} SET etag = coalesce(?, etag), last_modified = coalesce(?, last_modified), "
+            "content_hash = coalesce(?, content_hash), last_seen = ? WHERE url = ?",
+            (etag, last_modified, content_hash, now, url))
+        self.conn.commit()
+        return changed
+
+    def close(self):
+        self.conn.close()
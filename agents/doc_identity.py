@@ -0,0 +1,199 @@
+# agents/doc_identity.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from .extraction_cache import file_sha256
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard become candidates
+SHINGLE_WORDS = 5
+MIN_SHINGLES = 20  # below this a signature says nothing useful
+NEAR_DUP_CHARS = 50000  # text budget read for near-duplicate detection
+
+_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1)
+# Fixed permutations so signatures stay comparable across runs.
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text, k=SHINGLE_WORDS):
+    words = WORD_RE.findall(str(text).lower())
+    return {" ".join(words[i:i + k]) for i in range(max(len(words) - k + 1, 0))}
+
+
+def minhash(text, chunk_size=8192):
+    """MinHash signature (NUM_PERM uint64) of the word shingles of `text`, or None if too short."""
+    grams = shingles(text)
+    if len(grams) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    signature = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), chunk_size):
+        block = hashes[start:start + chunk_size, None]
+        # a < 2^31 and crc32 < 2^32 keep a*x + b below 2^63: no uint64 overflow.
+        signature = np.minimum(signature, ((_PERM_A * block + _PERM_B) % _PRIME).min(axis=0))
+    return signature
+
+
+def band_keys(signature):
+    rows = NUM_PERM // BANDS
+    return [hashlib.blake2b(signature[b * rows:(b + 1) * rows].tobytes(), digest_size=8).hexdigest()
+            for b in range(BANDS)]
+
+
+class DocRegistry:
+    """
+    Identity of tender documents (SQLite), so each one is processed once:
+    - Downloads are stored under their content hash; every URL is mapped to that hash
+    - Near-duplicates (corrigenda, mirrored copies) are found with MinHash + LSH banding
+      over word shingles of the extracted text
+    - duplicate_of() names the first copy, whose results the duplicate reuses
+    """
+
+    def __init__(self, path="data/doc_registry.sqlite", threshold=0.85):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                sha TEXT PRIMARY KEY,
+                path TEXT,
+                size INTEGER NOT NULL DEFAULT 0,
+                duplicate_of TEXT,
+                similarity REAL,
+                signature BLOB,
+                first_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                sha TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS lsh (
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, sha)
+            );
+        """)
+        self.conn.commit()
+
+    def store_download(self, tmp_path, url, out_dir):
+        """
+        Move a fresh download to `<out_dir>/<sha>.pdf` and map `url` to it.
+        Returns (path, is_new); for a document already on disk the new copy is dropped.
+        """
+        sha = file_sha256(tmp_path)
+        path = os.path.join(out_dir, f"{sha[:24]}.pdf")
+        is_new = not os.path.exists(path)
+        if is_new:
+            os.replace(tmp_path, path)
+        else:
+            os.remove(tmp_path)
+        self.register_file(path, sha=sha, url=url)
+        return path, is_new
+
+    def register_file(self, path, sha=None, url=None):
+        """Record a document (and the URL it came from); returns its SHA-256."""
+        sha = sha or file_sha256(path)
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO documents (sha, path, size, first_seen) VALUES (?, ?, ?, ?)",
+                (sha, path, os.path.getsize(path), now))
+            if url is not None:
+                self.conn.execute(
+                    "INSERT INTO urls (url, sha, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET sha = excluded.sha, last_seen = excluded.last_seen",
+                    (url, sha, now, now))
+            self.conn.commit()
+        return sha
+
+    def _one(self, sql, params):
+        with self._lock:
+            row = self.conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def sha_for_url(self, url):
+        return self._one("SELECT sha FROM urls WHERE url = ?", (url,))
+
+    def sha_for_path(self, path):
+        """
+        SHA recorded for the document at `path`, or None if it is unknown or its size
+        changed since. Stored downloads are never rewritten in place, so this saves rehashing.
+        """
+        forms = {path, os.path.abspath(path), os.path.relpath(path)}
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT sha, size FROM documents WHERE path IN ({', '.join('?' * len(forms))})",
+                tuple(forms)).fetchall()
+        size = os.path.getsize(path)
+        return next((sha for sha, stored_size in rows if stored_size == size), None)
+
+    def urls_for(self, sha):
+        with self._lock:
+            rows = self.conn.execute("SELECT url FROM urls WHERE sha = ? ORDER BY first_seen", (sha,)).fetchall()
+        return [r[0] for r in rows]
+
+    def path_for(self, sha):
+        return self._one("SELECT path FROM documents WHERE sha = ?", (sha,))
+
+    def duplicate_of(self, sha):
+        """SHA of the first copy if `sha` is a known near-duplicate, else None."""
+        return self._one("SELECT duplicate_of FROM documents WHERE sha = ?", (sha,))
+
+    def is_signed(self, sha):
+        """True once check_text() has stored a MinHash signature for `sha`."""
+        return self._one("SELECT signature IS NOT NULL FROM documents WHERE sha = ?", (sha,)) == 1
+
+    def check_text(self, sha, text):
+        """
+        Sign `text` for document `sha` and look for an earlier near-duplicate.
+        Returns the first copy's SHA, or None if the document is original (or too short to tell).
+        Documents are signed once; later calls return the stored answer.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT signature, duplicate_of FROM documents WHERE sha = ?",
+                                    (sha,)).fetchone()
+        if row is not None and row[0] is not None:
+            return row[1]
+
+        signature = minhash(text)
+        if signature is None:
+            return None
+        keys = band_keys(signature)
+        with self._lock:
+            candidates = {c for band, key in enumerate(keys) for (c,) in self.conn.execute(
+                "SELECT sha FROM lsh WHERE band = ? AND bucket = ? AND sha != ?", (band, key, sha))}
+            best, best_similarity = None, 0.0
+            for candidate in sorted(candidates):
+                other, first = self.conn.execute(
+                    "SELECT signature, coalesce(duplicate_of, sha) FROM documents WHERE sha = ?",
+                    (candidate,)).fetchone()
+                similarity = float(np.mean(np.frombuffer(other, dtype=np.uint64) == signature))
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best, best_similarity = first, similarity
+
+            self.conn.execute("INSERT OR IGNORE INTO documents (sha, size, first_seen) VALUES (?, 0, ?)",
+                              (sha, time.time()))
+            self.conn.execute("UPDATE documents SET signature = ?, duplicate_of = ?, similarity = ? "
+                              "WHERE sha = ?", (signature.tobytes(), best, best_similarity or None, sha))
+            self.conn.executemany("INSERT OR IGNORE INTO lsh (band, bucket, sha) VALUES (?, ?, ?)",
+                                  [(band, key, sha) for band, key in enumerate(keys)])
+            self.conn.commit()
+        return best
+
+    def close(self):
+        self.conn.close()
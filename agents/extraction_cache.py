@@ -0,0 +1,168 @@
+# agents/extraction_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Bump whenever extraction/OCR output changes so stale entries are ignored.
+EXTRACTOR_VERSION = "1"
+
+FIELDS = ("pages", "page_count", "complete", "has_text", "ocr_path", "ocr_text", "fields")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of PDF extraction results (SQLite).
+    - Keyed by SHA-256 of the PDF bytes + extractor version
+    - Holds page texts, page count, text-layer flag, OCR result and structured fields
+    - Size-bounded with least-recently-used eviction
+    """
+
+    def __init__(self, path="data/cache/extraction.sqlite", max_bytes=512 * 1024 * 1024,
+                 version=EXTRACTOR_VERSION):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self._lock = threading.Lock()
+        self._digests = {}
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                pages TEXT,
+                page_count INTEGER,
+                complete INTEGER,
+                has_text INTEGER,
+                ocr_path TEXT,
+                ocr_text TEXT,
+                fields TEXT,
+                pdf_size INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(entries)")}
+        if "fields" not in columns:  # caches created before structured fields existed
+            self.conn.execute("ALTER TABLE entries ADD COLUMN fields TEXT")
+        self.conn.commit()
+
+    def digest(self, pdf_path):
+        """SHA-256 of the file, memoised per (path, size, mtime) for this process."""
+        st = os.stat(pdf_path)
+        memo_key = (os.path.abspath(pdf_path), st.st_size, st.st_mtime_ns)
+        sha = self._digests.get(memo_key)
+        if sha is None:
+            sha = file_sha256(pdf_path)
+            self._digests[memo_key] = sha
+        return sha
+
+    def _key(self, sha):
+        return f"{self.version}:{sha}"
+
+    def get(self, sha, field=None):
+        """
+        Return the cached record for `sha`, or None.
+        With `field` (a name or a tuple of names), a record lacking any of them counts as a miss.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(FIELDS)}, pdf_size FROM entries WHERE key = ?",
+                (self._key(sha),)).fetchone()
+            record = None
+            if row is not None:
+                record = dict(zip(FIELDS + ("pdf_size",), row))
+                for name in ("pages", "fields"):
+                    if record[name] is not None:
+                        record[name] = json.loads(record[name])
+                wanted = (field,) if isinstance(field, str) else field or ()
+                if any(record.get(name) is None for name in wanted):
+                    record = None
+
+            if record is None:
+                self._bump("misses", 1)
+            else:
+                self._bump("hits", 1)
+                self._bump("bytes_saved", record["pdf_size"] or 0)
+                self.conn.execute("UPDATE entries SET last_access = ? WHERE key = ?",
+                                  (time.time(), self._key(sha)))
+            self.conn.commit()
+            return record
+
+    def put(self, sha, pdf_size=0, **fields):
+        """Insert or update the record for `sha`; only the given fields are overwritten."""
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown cache fields: {sorted(unknown)}")
+        for name in ("pages", "fields"):
+            if fields.get(name) is not None:
+                fields[name] = json.dumps(fields[name])
+        for name in ("complete", "has_text"):
+            if fields.get(name) is not None:
+                fields[name] = int(fields[name])
+
+        key = self._key(sha)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO entries (key, pdf_size, last_access) VALUES (?, ?, ?)",
+                (key, pdf_size, time.time()))
+            if fields:
+                assignments = ", ".join(f"{name} = ?" for name in fields)
+                self.conn.execute(f"UPDATE entries SET {assignments} WHERE key = ?",
+                                  (*fields.values(), key))
+            self.conn.execute("""
+                UPDATE entries
+                SET size = length(coalesce(pages, '')) + length(coalesce(ocr_text, ''))
+                         + length(coalesce(ocr_path, '')) + length(coalesce(fields, '')),
+                    last_access = ?
+                WHERE key = ?""", (time.time(), key))
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _bump(self, name, amount):
+        self.conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount))
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = self.conn.execute(
+                "SELECT count(*), coalesce(sum(size), 0) FROM entries").fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "bytes_saved": counters.get("bytes_saved", 0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,162 @@
+# agents/field_extractor.py
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
+
+from .amounts import parse_amount
+
+# Bump when patterns change so cached records are re-extracted.
+FIELD_EXTRACTOR_VERSION = "3"
+
+# A heading starts a line, optionally numbered ("4.", "IV)", "Section 5 -").
+_HEADING = r"^[ \t]*(?:(?:section|chapter|part)\s+[ivxlc\d]+\s*[:.\-–]?\s*|[ivxlc\d]+[.)]\s*)?"
+
+LABELS = {
+    "tender_fee": r"tender\s+(?:document\s+)?fee|cost\s+of\s+(?:the\s+)?(?:tender|bid)\s+document",
+    "emd": r"\bemd\b|earnest\s+money(?:\s+deposit)?|bid\s+security",
+    "bid_due_date": (r"(?:last|closing|due|end)\s+date(?:\s+(?:and|&)\s+time)?\s+(?:of|for)\s+"
+                     r"(?:online\s+)?(?:bid\s+)?submission|bid\s+(?:submission\s+)?(?:end|due|closing)\s+date"),
+    "opening_date": (r"(?:technical\s+)?(?:bid|tender)\s+opening\s+date"
+                     r"|date(?:\s+(?:and|&)\s+time)?\s+of\s+(?:technical\s+)?(?:bid\s+|tender\s+)?opening"),
+    "spec_start": (_HEADING + r"(?:technical\s+specifications?|scope\s+of\s+(?:work|supply)"
+                   r"|bill\s+of\s+quantit(?:y|ies)|boq\b|schedule\s+of\s+requirements?)"
+                   # rest of a heading line: short and not a sentence
+                   r"[^\n.]{0,60}$"),
+}
+SPEC_END = re.compile(
+    _HEADING + r"(?:terms\s+(?:and|&)\s+conditions|eligibility\s+criteria|instructions\s+to\s+bidders"
+    r"|general\s+conditions\s+of\s+contract|special\s+conditions\s+of\s+contract|evaluation\s+criteria"
+    r"|annexure|bid\s+form)",
+    re.IGNORECASE | re.MULTILINE)
+
+DATE_RE = re.compile(
+    r"\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}"
+    r"|\d{1,2}(?:st|nd|rd|th)?[-\s](?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?[-\s]\d{4}"
+    r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}",
+    re.IGNORECASE)
+DATE_FORMATS = ["%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%d-%m-%y", "%d/%m/%y", "%d.%m.%y",
+                "%d %b %Y", "%d %B %Y", "%d-%b-%Y", "%d-%B-%Y", "%b %d %Y", "%B %d %Y"]
+
+ALL_LABELS = tuple(LABELS)
+AMOUNT_FIELDS = ("tender_fee", "emd")
+DATE_FIELDS = ("bid_due_date", "opening_date")
+
+
+@lru_cache(maxsize=None)
+def label_pattern(names):
+    """Combined alternation of the label patterns still being looked for, compiled once per set."""
+    return re.compile("|".join(f"(?P<{n}>{LABELS[n]})" for n in names), re.IGNORECASE | re.MULTILINE)
+
+
+@dataclass
+class TenderRecord:
+    """Structured fields of one tender document."""
+    file: str
+    tender_fee: Optional[float] = None
+    emd: Optional[float] = None
+    bid_due_date: Optional[str] = None
+    opening_date: Optional[str] = None
+    spec_sections: List[str] = field(default_factory=list)
+    pages_scanned: int = 0
+
+    @property
+    def spec_text(self):
+        return "\n".join(self.spec_sections)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def parse_date(text):
+    """ISO date for the first date in `text`, the raw match if its format is unknown, or None."""
+    m = DATE_RE.search(text)
+    if not m:
+        return None
+    raw = m.group(0)
+    cleaned = re.sub(r"(?<=\d)(st|nd|rd|th)\b", "", raw, flags=re.IGNORECASE)
+    cleaned = re.sub(r"(?<=[a-z])\.", "", cleaned, flags=re.IGNORECASE).replace(",", "")
+    cleaned = re.sub(r"\s+", " ", cleaned)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return raw
+
+
+class FieldExtractor:
+    """
+    Single-pass extraction over a stream of page texts:
+    - One combined regex finds the fee, EMD, due/opening date and spec-section labels
+    - A field's pattern is dropped from the regex as soon as that field has a value
+    - A value is read from at most `value_window` characters after its label, and never
+      past the next label
+    - Stops reading pages once every scalar field is found and either a spec section
+      has ended or `spec_page_budget` pages were read without one
+    """
+
+    def __init__(self, value_window=200, max_spec_chars=20000, max_sections=3, spec_page_budget=10):
+        self.value_window = value_window
+        self.max_spec_chars = max_spec_chars
+        self.max_sections = max_sections
+        self.spec_page_budget = spec_page_budget
+
+    def extract(self, pages, file=None):
+        record = TenderRecord(file=file)
+        remaining = [n for n in LABELS if n != "spec_start"]
+        section = None  # list of chunks while inside a spec section
+        section_chars = 0
+
+        for text in pages:
+            record.pages_scanned += 1
+            pos = 0
+            while pos < len(text):
+                if section is not None:
+                    end = SPEC_END.search(text, pos)
+                    stop = end.start() if end else len(text)
+                    chunk = text[pos:stop][:self.max_spec_chars - section_chars]
+                    section.append(chunk)
+                    section_chars += len(chunk)
+                    if end is None and section_chars < self.max_spec_chars:
+                        break  # section continues on the next page
+                    record.spec_sections.append("".join(section).strip())
+                    section = None
+                    pos = end.end() if end else stop
+                    continue
+
+                names = tuple(remaining) + (("spec_start",) if len(record.spec_sections) < self.max_sections else ())
+                if not names:
+                    break
+                m = label_pattern(names).search(text, pos)
+                if m is None:
+                    break
+                name = m.lastgroup
+                pos = m.end()
+                if name == "spec_start":
+                    section = [m.group(0).strip(), "\n"]
+                    section_chars = 0
+                    continue
+
+                window = text[pos:pos + self.value_window]
+                # A field without a value ("Exempted", "will be intimated") must not take the next one's.
+                following = label_pattern(ALL_LABELS).search(text, pos)
+                if following is not None and following.start() < pos + len(window):
+                    window = window[:following.start() - pos]
+                value = parse_amount(window) if name in AMOUNT_FIELDS else parse_date(window)
+                if value is not None:
+                    setattr(record, name, value)
+                    remaining.remove(name)
+
+            if not remaining and section is None and (
+                    record.spec_sections or record.pages_scanned >= self.spec_page_budget):
+                break
+
+        if section is not None:
+            record.spec_sections.append("".join(section).strip())
+        return record
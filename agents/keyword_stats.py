@@ -0,0 +1,150 @@
+# agents/keyword_stats.py
+import json
+import os
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from .metrics import metrics
+
+STATS_VERSION = 1
+N_FEATURES = 2 ** 20
+
+
+def _identity(tokens):
+    return tokens
+
+
+class KeywordStats:
+    """
+    Incremental keyword statistics over the parsed tender corpus.
+    - Per-document term counts hashed into a sparse matrix (no vocabulary to refit)
+    - Corpus term/document frequencies updated only with newly added tenders
+    - Top-K keywords per tender, per portal and overall, straight from the sparse data
+    Persisted under `root` as counts.npz, totals.npz, terms.json and meta.json.
+    """
+
+    def __init__(self, root="data/keywords", n_features=N_FEATURES):
+        self.root = root
+        self.n_features = n_features
+        # Tokenise once with the English stop list, then hash the token lists.
+        self.analyzer = HashingVectorizer(stop_words="english").build_analyzer()
+        self.hasher = HashingVectorizer(analyzer=_identity, n_features=n_features,
+                                        alternate_sign=False, norm=None)
+        self.counts = sp.csr_matrix((0, n_features), dtype=np.int64)
+        self.tf = np.zeros(n_features, dtype=np.int64)
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self.terms = {}  # hashed column -> first term seen there
+        self.docs = []
+        self.portals = []
+        self._rows = {}
+        self._load()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, doc):
+        return doc in self._rows
+
+    def add(self, docs, texts, portals=None):
+        """
+        Add new tenders; documents already in the stats are skipped.
+        Returns the number of documents added.
+        """
+        portals = portals if portals is not None else [None] * len(docs)
+        new = [(d, t, p) for d, t, p in zip(docs, texts, portals) if d not in self._rows]
+        new = list({d: (d, t, p) for d, t, p in new}.values())  # last text wins within a batch
+        if not new:
+            return 0
+
+        with metrics.stage("keywords"):
+            tokens = [self.analyzer(str(t)) for _, t, _ in new]
+            counts = self.hasher.transform(tokens).astype(np.int64).tocsr()
+            self._learn_terms(tokens)
+
+            self.tf += np.bincount(counts.indices, weights=counts.data,
+                                   minlength=self.n_features).astype(np.int64)
+            self.df += np.bincount(counts.indices, minlength=self.n_features)
+            self.counts = sp.vstack([self.counts, counts], format="csr")
+            for d, _, p in new:
+                self._rows[d] = len(self.docs)
+                self.docs.append(d)
+                self.portals.append(p or "unknown")
+        metrics.count("docs_indexed", len(new), stage="keywords")
+        return len(new)
+
+    def _learn_terms(self, tokens):
+        unique = sorted({t for doc in tokens for t in doc})
+        if not unique:
+            return
+        # One token per row, so each row's single column is that token's hash.
+        columns = self.hasher.transform([[t] for t in unique]).indices
+        for column, term in zip(columns.tolist(), unique):
+            self.terms.setdefault(column, term)
+
+    def top_overall(self, k=10, weighting="count"):
+        columns = np.flatnonzero(self.tf)
+        return self._top(self.tf[columns], columns, k, weighting)
+
+    def top_for_doc(self, doc, k=10, weighting="count"):
+        row = self.counts[self._rows[doc]]
+        return self._top(row.data, row.indices, k, weighting)
+
+    def top_for_portal(self, portal, k=10, weighting="count"):
+        rows = [i for i, p in enumerate(self.portals) if p == portal]
+        if not rows:
+            return []
+        sub = self.counts[rows].tocoo()
+        # Summing duplicate columns keeps the portal totals sparse.
+        summed = sp.csr_matrix((sub.data, (np.zeros_like(sub.col), sub.col)), shape=(1, self.n_features))
+        return self._top(summed.data, summed.indices, k, weighting)
+
+    def _top(self, values, columns, k, weighting):
+        """[(term, score)] for the k highest-scoring `columns`, `values` being their counts."""
+        if len(columns) == 0:
+            return []
+        scores = np.asarray(values, dtype=float)
+        if weighting == "tfidf":
+            scores = scores * (np.log((1 + len(self.docs)) / (1 + self.df[columns])) + 1)
+        elif weighting != "count":
+            raise ValueError(f"Unknown weighting: {weighting}")
+        k = min(k, len(columns))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.terms.get(int(columns[i]), f"#{int(columns[i])}"), float(scores[i])) for i in best]
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        sp.save_npz(self._path("counts.tmp.npz"), self.counts, compressed=False)
+        np.savez(self._path("totals.tmp.npz"), tf=self.tf, df=self.df)
+        with open(self._path("terms.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump({str(c): t for c, t in self.terms.items()}, f)
+        with open(self._path("meta.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": STATS_VERSION, "n_features": self.n_features,
+                       "docs": self.docs, "portals": self.portals}, f)
+        # meta.json goes last; _load() rejects counts that don't match its document list.
+        for name in ("counts.npz", "totals.npz", "terms.json", "meta.json"):
+            stem, ext = os.path.splitext(name)
+            os.replace(self._path(f"{stem}.tmp{ext}"), self._path(name))
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _load(self):
+        if not os.path.exists(self._path("meta.json")):
+            return
+        with open(self._path("meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != STATS_VERSION or meta.get("n_features") != self.n_features:
+            return
+        counts = sp.load_npz(self._path("counts.npz")).tocsr()
+        if counts.shape[0] != len(meta["docs"]):
+            return  # interrupted save: start over rather than mix generations
+        totals = np.load(self._path("totals.npz"))
+        with open(self._path("terms.json"), encoding="utf-8") as f:
+            self.terms = {int(c): t for c, t in json.load(f).items()}
+        self.counts = counts
+        self.tf, self.df = totals["tf"], totals["df"]
+        self.docs, self.portals = meta["docs"], meta["portals"]
+        self._rows = {d: i for i, d in enumerate(self.docs)}
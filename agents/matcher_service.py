@@ -0,0 +1,55 @@
+# agents/matcher_service.py
+import logging
+import threading
+import time
+
+from .sku_catalogue import SkuCatalogue
+from .technical_agent import TechnicalAgent
+
+logger = logging.getLogger(__name__)
+
+
+class MatcherService:
+    """
+    Resident SKU matcher: the catalogue is loaded (memory-mapped) once and kept warm,
+    so a request for one tender costs only the scoring.
+    - At most every `reload_interval` seconds, products.csv is checked for changes
+      and only the changed rows are reloaded
+    - Safe to share between threads (e.g. every BackboneAgent pipeline in a process);
+      requests are scored one at a time, each using all cores, so a reload never
+      swaps the catalogue under a running match
+    """
+
+    def __init__(self, products_csv="data/products.csv", reload_interval=5.0, method="cdist"):
+        self.catalogue = SkuCatalogue(products_csv)
+        self.agent = TechnicalAgent(parsed_csv=None, products_csv=products_csv, catalogue=self.catalogue)
+        self.reload_interval = reload_interval
+        self.method = method
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def maybe_reload(self):
+        """Refresh the catalogue if the check interval has passed and the CSV changed; returns the diff or None."""
+        with self._lock:
+            return self._maybe_reload()
+
+    def _maybe_reload(self):
+        if time.monotonic() - self._checked < self.reload_interval:
+            return None
+        self._checked = time.monotonic()
+        diff = self.catalogue.refresh()
+        if diff is not None:
+            self.agent.reload_catalogue()
+            logger.info("SKU catalogue reloaded: %s", diff)
+        return diff
+
+    def match(self, tender_name, tender_text, threshold=40, top_k=None, method=None):
+        """Matches for one tender, as TechnicalAgent.match returns them."""
+        return self.match_many([tender_name], [tender_text], threshold=threshold, top_k=top_k, method=method)
+
+    def match_many(self, tender_names, tender_texts, threshold=40, top_k=None, method=None):
+        texts = [str(t).lower() for t in tender_texts]
+        with self._lock:
+            self._maybe_reload()
+            return self.agent.match(tender_names, texts, threshold=threshold,
+                                    method=method or self.method, top_k=top_k)
@@ -0,0 +1,153 @@
+# agents/metrics.py
+import json
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """High-water mark of this process's resident memory, or 0 where unsupported."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+
+CPU_CLOCKS = {"thread": time.thread_time, "process": time.process_time}
+
+
+class Metrics:
+    """
+    Process-wide timing and throughput registry every agent reports into.
+    - stage(): wall time, CPU time and peak RSS per stage (and document)
+    - count(): throughput counters such as bytes downloaded, pages OCR'd, pairs scored
+    Totals per stage are kept as running sums, so memory stays flat in long-lived
+    processes; only the last `max_records` raw records are buffered for to_jsonl(),
+    which drains them (`dropped` counts records that fell out before an export).
+    Export as JSON lines, Prometheus text format, or a summary table.
+    """
+
+    def __init__(self, max_records=10000):
+        self._lock = threading.Lock()
+        self.records = deque(maxlen=max_records)
+        self.dropped = 0
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+            self.dropped = 0
+            self._totals.clear()
+
+    @contextmanager
+    def stage(self, stage, doc=None, clock="thread"):
+        """
+        Time the enclosed block.
+        cpu_s comes from the calling thread's CPU clock by default, which misses work done
+        in worker processes, and is wrong for blocks that await or hand off to threads.
+        Such stages pass clock="process": CPU time of the whole process, which also
+        counts anything else running concurrently, so read it as an upper bound.
+        """
+        cpu_clock = CPU_CLOCKS[clock]
+        wall = time.perf_counter()
+        cpu = cpu_clock()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self._add({
+                "type": "stage",
+                "stage": stage,
+                "doc": doc,
+                "wall_s": time.perf_counter() - wall,
+                "cpu_s": cpu_clock() - cpu,
+                "peak_rss_bytes": peak_rss_bytes(),
+                "ok": ok,
+                "ts": time.time(),
+            })
+
+    def count(self, name, value=1, stage=None, doc=None):
+        self._add({"type": "count", "name": name, "value": value, "stage": stage,
+                   "doc": doc, "ts": time.time()})
+
+    def _add(self, record):
+        with self._lock:
+            totals = self._totals[record["stage"] or "-"]
+            if record["type"] == "stage":
+                totals["calls"] += 1
+                totals["errors"] += 0 if record["ok"] else 1
+                totals["wall_s"] += record["wall_s"]
+                totals["cpu_s"] += record["cpu_s"]
+            else:
+                totals[record["name"]] += record["value"]
+            if len(self.records) == self.records.maxlen:
+                self.dropped += 1
+            self.records.append(record)
+
+    def aggregate(self):
+        """{stage: {"calls", "errors", "wall_s", "cpu_s", <counter>: total}}"""
+        with self._lock:
+            return {stage: dict(values) for stage, values in self._totals.items()}
+
+    def to_jsonl(self, path, append=False):
+        """Write the buffered raw records and drain the buffer; totals are kept."""
+        with self._lock:
+            records = list(self.records)
+            self.records.clear()
+        with open(path, "a" if append else "w", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(r) + "\n")
+
+    def prometheus_text(self):
+        lines = []
+        gauges = {
+            "calls": ("rfp_stage_calls_total", "counter", "Stage invocations"),
+            "errors": ("rfp_stage_errors_total", "counter", "Stage invocations that raised"),
+            "wall_s": ("rfp_stage_wall_seconds_total", "counter", "Wall-clock seconds spent in stage"),
+            "cpu_s": ("rfp_stage_cpu_seconds_total", "counter", "CPU seconds spent in stage (see Metrics.stage)"),
+        }
+        agg = self.aggregate()
+        counters = sorted({k for values in agg.values() for k in values} - set(gauges))
+        for key, (metric, kind, help_text) in list(gauges.items()) + [
+                (c, (f"rfp_{c}_total", "counter", f"Total {c.replace('_', ' ')}")) for c in counters]:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for stage, values in sorted(agg.items()):
+                if key in values:
+                    lines.append(f'{metric}{{stage="{stage}"}} {values[key]:g}')
+        lines.append("# HELP rfp_peak_rss_bytes Peak resident memory of the process")
+        lines.append("# TYPE rfp_peak_rss_bytes gauge")
+        lines.append(f"rfp_peak_rss_bytes {peak_rss_bytes()}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+
+    def summary_table(self):
+        agg = self.aggregate()
+        counters = sorted({k for values in agg.values() for k in values}
+                          - {"calls", "errors", "wall_s", "cpu_s"})
+        header = ["stage", "calls", "errors", "wall_s", "cpu_s"] + counters
+        rows = [header]
+        for stage, values in sorted(agg.items(), key=lambda kv: -kv[1].get("wall_s", 0)):
+            rows.append([stage] + [f"{values.get(c, 0):.2f}" if c.endswith("_s") else f"{values.get(c, 0):g}"
+                                   for c in header[1:]])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = ["  ".join(cell.ljust(w) for cell, w in zip(row, widths)) for row in rows]
+        lines.insert(1, "  ".join("-" * w for w in widths))
+        lines.append(f"peak RSS: {peak_rss_bytes() / 1e6:.1f} MB")
+        return "\n".join(lines)
+
+
+metrics = Metrics()
@@ -1,69 +1,125 @@
 # agents/ocr_agent.py
-import fitz
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
 import os
+from .metrics import metrics
+from .ocr_engine import OcrEngine
+from .text_layer import ocr_output_path, probe_text_layer
 
 class OcrAgent:
     """
     OCR Agent:
     - Checks each PDF for text content
-    - Runs OCR on scanned (image-only) PDFs
-    - Produces a searchable (text-embedded) PDF
+    - Runs OCR on scanned (image-only) PDFs, or only on the scanned pages of mixed PDFs
+    - Produces a searchable PDF (original images + invisible text) with text/word-box sidecars
+    Pages are rendered and OCR'd one at a time by a pool of `workers` processes at `dpi`.
+    The pool outlives single run_ocr() calls: close() it, or use the agent as a context manager.
     """
 
-    def __init__(self, input_dir="data/rfps", output_dir=None):
+    def __init__(self, input_dir="data/rfps", output_dir=None, cache=None, workers=None, dpi=300):
         self.input_dir = input_dir
         self.output_dir = output_dir or input_dir
+        self.cache = cache  # optional ExtractionCache
+        self.engine = OcrEngine(workers=workers, dpi=dpi)
         os.makedirs(self.output_dir, exist_ok=True)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut down the OCR worker pool (it is recreated on the next OCR)."""
+        self.engine.close()
+
     def has_text(self, pdf_path):
-        """Check if the PDF already has selectable text."""
+        """Check if the PDF already has selectable text (stops at the first page that proves it)."""
         try:
-            doc = fitz.open(pdf_path)
-            text = "".join(page.get_text("text") for page in doc)
-            doc.close()
-            return len(text.strip()) > 30
+            sha = None
+            if self.cache is not None:
+                sha = self.cache.digest(pdf_path)
+                record = self.cache.get(sha, field="has_text")
+                if record is not None:
+                    return bool(record["has_text"])
+
+            with metrics.stage("text_probe", doc=os.path.basename(pdf_path)):
+                found = probe_text_layer(pdf_path, threshold=30)["has_text"]
+
+            if sha is not None:
+                self.cache.put(sha, pdf_size=os.path.getsize(pdf_path), has_text=found)
+            return found
         except Exception:
             return False
 
-    def run_ocr(self, pdf_path):
-        """Perform OCR on image-based PDF and save new searchable copy."""
+    def image_pages(self, pdf_path):
+        """Indices of pages without a text layer, or None if the PDF can't be read."""
         try:
-            images = convert_from_path(pdf_path, dpi=300)
-            pdf_writer = fitz.open()
+            return probe_text_layer(pdf_path, threshold=30, coverage=True)["image_pages"]
+        except Exception:
+            return None
+
+    def run_ocr(self, pdf_path, pages=None):
+        """
+        Perform OCR on image-based PDF and save new searchable copy.
+        The copy keeps the original page images with an invisible text layer on top,
+        plus `<name>_ocr.txt` and `<name>_ocr.words.json` sidecars.
+        With `pages`, only those (0-based) pages are OCR'd.
+        """
+        try:
+            ocr_path = ocr_output_path(pdf_path, self.output_dir)
+            sha = None
+            if self.cache is not None:
+                sha = self.cache.digest(pdf_path)
+                record = self.cache.get(sha, field="ocr_path")
+                if record is not None and os.path.exists(record["ocr_path"]):
+                    print(f"♻️  OCR cached: {record['ocr_path']}")
+                    return record["ocr_path"]
+            if os.path.exists(ocr_path) and os.path.getmtime(ocr_path) >= os.path.getmtime(pdf_path):
+                print(f"♻️  OCR output already up to date: {ocr_path}")
+                return ocr_path
 
-            for img in images:
-                text = pytesseract.image_to_string(img)
-                pix = fitz.Pixmap(fitz.csRGB, img.width, img.height, 8)
-                pdf_page = pdf_writer.new_page(width=img.width, height=img.height)
-                pdf_page.insert_text((20, 20), text[:2000])  # embed recognized text
-            ocr_path = os.path.join(self.output_dir, os.path.basename(pdf_path).replace(".pdf", "_ocr.pdf"))
-            pdf_writer.save(ocr_path)
-            pdf_writer.close()
+            doc = os.path.basename(pdf_path)
+            with metrics.stage("ocr", doc=doc):
+                result = self.engine.make_searchable(pdf_path, ocr_path, pages=pages)
+            metrics.count("pages_ocrd", result["pages_ocrd"], stage="ocr", doc=doc)
+
+            if sha is not None:
+                self.cache.put(sha, pdf_size=os.path.getsize(pdf_path),
+                               ocr_path=ocr_path, ocr_text=result["text"])
             print(f"🧠 OCR complete: {ocr_path}")
             return ocr_path
         except Exception as e:
             print(f"⚠️ OCR failed for {pdf_path}: {e}")
             return None
 
-    def run(self):
-        """Run OCR on all PDFs in folder."""
+    def run(self, ocr_mixed=False):
+        """
+        Run OCR on all PDFs in folder.
+        With ocr_mixed=True every page is probed, and PDFs that have text but
+        also contain scanned pages get those pages OCR'd.
+        """
         processed_files = []
-        for file in os.listdir(self.input_dir):
-            if not file.lower().endswith(".pdf"):
-                continue
-            pdf_path = os.path.join(self.input_dir, file)
+        try:
+            for file in os.listdir(self.input_dir):
+                if not file.lower().endswith(".pdf") or file.endswith("_ocr.pdf"):
+                    continue
+                pdf_path = os.path.join(self.input_dir, file)
 
-            if self.has_text(pdf_path):
-                print(f"✅ {file} already has text; skipping OCR.")
-                processed_files.append(pdf_path)
-            else:
-                print(f"🧾 {file} has no text layer — performing OCR...")
-                ocr_file = self.run_ocr(pdf_path)
-                if ocr_file:
-                    processed_files.append(ocr_file)
+                if not self.has_text(pdf_path):
+                    print(f"🧾 {file} has no text layer — performing OCR...")
+                    ocr_file = self.run_ocr(pdf_path)
+                    if ocr_file:
+                        processed_files.append(ocr_file)
+                    continue
 
+                image_pages = self.image_pages(pdf_path) if ocr_mixed else None
+                if image_pages:
+                    print(f"🧾 {file} has {len(image_pages)} scanned page(s) — performing OCR on those...")
+                    ocr_file = self.run_ocr(pdf_path, pages=image_pages)
+                    processed_files.append(ocr_file or pdf_path)
+                else:
+                    print(f"✅ {file} already has text; skipping OCR.")
+                    processed_files.append(pdf_path)
+        finally:
+            self.close()
         print(f"\n✅ OCR Agent complete. Total processed files: {len(processed_files)}")
         return processed_files
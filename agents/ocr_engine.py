@@ -0,0 +1,155 @@
+# agents/ocr_engine.py
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+import pytesseract
+from PIL import Image
+
+from .text_layer import sidecar_paths
+
+
+def render_page(pdf_path, page_index, dpi=300):
+    """Rasterize a single page to a PIL image."""
+    with fitz.open(pdf_path) as doc:
+        pix = doc[page_index].get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def ocr_page(pdf_path, page_index, dpi=300, lang="eng"):
+    """
+    Render and OCR one page. Runs inside a worker process, so only
+    one rasterized page per worker is ever held in memory.
+    Word boxes are in image pixels.
+    """
+    img = render_page(pdf_path, page_index, dpi)
+    data = pytesseract.image_to_data(img, lang=lang, output_type=pytesseract.Output.DICT)
+
+    words = []
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        left, top = data["left"][i], data["top"][i]
+        words.append({
+            "text": word,
+            "conf": float(data["conf"][i]),
+            "box": [left, top, left + data["width"][i], top + data["height"][i]],
+        })
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(line_key, []).append(word)
+    text = "\n".join(" ".join(line) for line in lines.values())
+    return {"page": page_index, "text": text, "words": words, "width": img.width, "height": img.height}
+
+
+def overlay_words(page, result):
+    """Write OCR words onto `page` as invisible (render_mode=3) text over their boxes."""
+    sx = page.rect.width / result["width"]
+    sy = page.rect.height / result["height"]
+    boxes = []
+    for word in result["words"]:
+        x0, y0, x1, y1 = word["box"]
+        rect = fitz.Rect(x0 * sx, y0 * sy, x1 * sx, y1 * sy)
+        boxes.append({"text": word["text"], "conf": word["conf"],
+                      "bbox": [round(v, 2) for v in rect]})
+        fontsize = max(rect.height * 0.85, 1)
+        length = fitz.get_text_length(word["text"], fontname="helv", fontsize=fontsize)
+        origin = fitz.Point(rect.x0, rect.y1)
+        # Stretch the text horizontally so selections line up with the scanned word.
+        morph = (origin, fitz.Matrix(rect.width / length, 1)) if length else None
+        page.insert_text(origin, word["text"], fontsize=fontsize, fontname="helv",
+                         render_mode=3, morph=morph)
+    return boxes
+
+
+class OcrEngine:
+    """
+    Streaming, page-parallel OCR:
+    - Pages are rendered one at a time inside Tesseract worker processes
+    - At most `window` pages are in flight, so peak memory does not grow with page count
+    - Results are yielded in page order
+    - One engine can be shared by several threads; they all submit to the same pool
+    """
+
+    def __init__(self, workers=None, dpi=300, window=None, lang="eng"):
+        self.workers = workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.window = window or 2 * self.workers
+        self.lang = lang
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def iter_pages(self, pdf_path, pages=None):
+        """Yield {"page", "text", "words", "width", "height"} for each page, in page order."""
+        if pages is None:
+            with fitz.open(pdf_path) as doc:
+                pages = range(doc.page_count)
+
+        in_flight = deque()
+        for page_index in pages:
+            if len(in_flight) >= self.window:
+                yield in_flight.popleft().result()
+            in_flight.append(self.pool.submit(ocr_page, pdf_path, page_index, self.dpi, self.lang))
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    def make_searchable(self, pdf_path, out_path, pages=None):
+        """
+        Write a searchable copy of `pdf_path` to `out_path`.
+        - Original pages (and their scanned images) are kept as-is
+        - OCR'd pages get an invisible text layer positioned over each word
+        - Sidecars: `<out>.txt` (pages separated by form feeds) and `<out>.words.json`
+        `pages` limits OCR to those 0-based pages; the others keep their own text layer.
+        """
+        text_path, words_path = sidecar_paths(out_path)
+        if pages is not None:
+            pages = sorted(pages)
+        doc = fitz.open(pdf_path)
+        try:
+            ocr_results = self.iter_pages(pdf_path, pages=pages)
+            pending = next(ocr_results, None)
+            page_texts = []
+            word_pages = []
+            for page in doc:
+                if pending is not None and pending["page"] == page.number:
+                    boxes = overlay_words(page, pending)
+                    page_texts.append(pending["text"])
+                    word_pages.append({"page": page.number, "source": "ocr", "words": boxes})
+                    pending = next(ocr_results, None)
+                else:
+                    page_texts.append(page.get_text("text"))
+                    word_pages.append({"page": page.number, "source": "text_layer", "words": []})
+            doc.save(out_path, garbage=3, deflate=True)
+        finally:
+            doc.close()
+
+        text = "\f".join(page_texts)
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        with open(words_path, "w", encoding="utf-8") as f:
+            json.dump({"source": os.path.basename(pdf_path), "dpi": self.dpi, "pages": word_pages}, f)
+        return {"ocr_path": out_path, "text_path": text_path, "words_path": words_path, "text": text,
+                "pages_ocrd": sum(1 for p in word_pages if p["source"] == "ocr")}
+
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
@@ -1,24 +1,295 @@
 # agents/parser_agent.py
 import fitz, os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from .doc_identity import NEAR_DUP_CHARS
+from .field_extractor import FIELD_EXTRACTOR_VERSION, FieldExtractor, TenderRecord
+from .metrics import metrics
+from .text_layer import read_sidecar_pages, sidecar_text_path
 
 class ParserAgent:
-    def __init__(self, input_dir="/Users/tejasanand/Desktop/RFP Automation/data/rfps"):
+    def __init__(self, input_dir="/Users/tejasanand/Desktop/RFP Automation/data/rfps", cache=None,
+                 registry=None):
         self.input_dir = input_dir
+        self.cache = cache  # optional ExtractionCache
+        self.registry = registry  # optional DocRegistry: near-duplicates reuse the first copy's fields
+        self.field_extractor = FieldExtractor()
+
+    def run(self, parallel=False, workers=None):
+        """Items with `file`, `text`, `fields` and `duplicate_of` (first copy's file name, or None)."""
+        if parallel:
+            return list(self.iter_records(workers=workers))
 
-    def run(self):
         extracted_data = []
-        for file in os.listdir(self.input_dir):
-            if file.lower().endswith(".pdf"):
-                path = os.path.join(self.input_dir, file)
-                print(f"📄 Parsing {file}...")
-                text = self.extract_text(path)
-                extracted_data.append({"file": file, "text": text[:1000]})
+        for file in self.pdf_files():
+            print(f"📄 Parsing {file}...")
+            extracted_data.append(self._record(file))
         return extracted_data
 
-    def extract_text(self, pdf_path):
-        doc = fitz.open(pdf_path)
-        text = ""
+    def iter_records(self, files=None, workers=None):
+        """
+        Like run(), but text and fields of each original are extracted together inside
+        a worker process; items are yielded as they finish. Near-duplicates are resolved
+        in this process afterwards, reusing their first copy's (by then cached) fields.
+        """
+        files = self.pdf_files() if files is None else files
+        pending, duplicates = [], []
+        for f in files:
+            path = os.path.join(self.input_dir, f)
+            if self.duplicate_of(path) is not None:
+                duplicates.append(f)
+                continue
+            # One lookup (one hit or miss) serves both the text and the fields.
+            record = self._cache_record(path, field=("pages", "fields"))
+            cached = self._pages_from(record, None, 1000)
+            fields = self._fields_from(record, path)
+            if cached is not None and fields is not None:
+                print(f"♻️  Cached {f}")
+                yield {"file": f, "text": cached["text"], "fields": fields, "duplicate_of": None}
+            else:
+                pending.append(f)
+
+        if pending:
+            workers = min(workers or os.cpu_count() or 1, len(pending))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(extract_document, os.path.join(self.input_dir, f),
+                                       self.field_extractor, 1000): f
+                           for f in pending}
+                for fut in as_completed(futures):
+                    file = futures[fut]
+                    try:
+                        result, fields = fut.result()
+                    except Exception as e:
+                        print(f"⚠️ Parsing failed for {file}: {e}")
+                        continue
+                    path = os.path.join(self.input_dir, file)
+                    metrics.count("pages_parsed", len(result["page_texts"]), stage="parse", doc=file)
+                    metrics.count("pages_scanned", fields.pages_scanned, stage="fields", doc=file)
+                    self._to_cache(path, result)
+                    self._cache_fields(path, fields)
+                    print(f"📄 Parsed {file} ({len(result['page_texts'])} pages)")
+                    yield {"file": file, "text": budget_text(result["page_texts"], 1000),
+                           "fields": fields, "duplicate_of": None}
+
+        for f in duplicates:
+            yield self._record(f)
+
+    def _record(self, file, text=None):
+        path = os.path.join(self.input_dir, file)
+        first = self.duplicate_of(path)
+        if text is None:
+            # Only the first 1000 characters are kept, so stop extracting there.
+            text = self.extract_text(path, max_chars=1000)
+        if first is not None:
+            print(f"♻️  {file} duplicates {os.path.basename(first)}; reusing its fields")
+            fields = replace(self.extract_fields(first), file=file)
+        else:
+            fields = self.extract_fields(path)
+        return {"file": file, "text": text[:1000], "fields": fields,
+                "duplicate_of": os.path.basename(first) if first else None}
+
+    def duplicate_of(self, pdf_path):
+        """Path of the first copy when `pdf_path` is a (near-)duplicate known to the registry, else None."""
+        if self.registry is None:
+            return None
+        # Downloads stored through the registry were hashed then; only other files are hashed here.
+        sha = self.registry.sha_for_path(pdf_path)
+        if sha is None:
+            sha = self.cache.digest(pdf_path) if self.cache is not None else None
+            sha = self.registry.register_file(pdf_path, sha=sha)
+        first = self.registry.duplicate_of(sha)
+        # Text is only needed to sign a document the registry has not seen the content of.
+        if first is None and not self.registry.is_signed(sha):
+            first = self.registry.check_text(sha, self.extract_text(pdf_path, max_chars=NEAR_DUP_CHARS))
+        path = self.registry.path_for(first) if first and first != sha else None
+        return path if path and os.path.exists(path) else None
+
+    def extract_fields(self, pdf_path):
+        """
+        Tender fee, EMD, due/opening dates and spec sections as a TenderRecord.
+        Pages are read lazily and only until every field is found; results are cached per document.
+        """
+        cached = self._cached_fields(pdf_path)
+        if cached is not None:
+            return cached
+        file = os.path.basename(pdf_path)
+        with metrics.stage("fields", doc=file):
+            record = self.field_extractor.extract(iter_page_texts(pdf_path), file=file)
+        metrics.count("pages_scanned", record.pages_scanned, stage="fields", doc=file)
+        self._cache_fields(pdf_path, record)
+        return record
+
+    def _cache_record(self, pdf_path, field):
+        """Cached record for `pdf_path` holding `field`, or None (also when an OCR sidecar exists)."""
+        # An OCR sidecar is newer than anything cached for the scan itself.
+        if self.cache is None or sidecar_text_path(pdf_path) is not None:
+            return None
+        return self.cache.get(self.cache.digest(pdf_path), field=field)
+
+    def _cached_fields(self, pdf_path):
+        return self._fields_from(self._cache_record(pdf_path, field="fields"), pdf_path)
+
+    @staticmethod
+    def _fields_from(record, pdf_path):
+        if record is None or record["fields"] is None or record["fields"].get("version") != FIELD_EXTRACTOR_VERSION:
+            return None
+        return TenderRecord.from_dict({**record["fields"]["record"], "file": os.path.basename(pdf_path)})
+
+    def _cache_fields(self, pdf_path, record):
+        if self.cache is None or sidecar_text_path(pdf_path) is not None:
+            return
+        self.cache.put(self.cache.digest(pdf_path), pdf_size=os.path.getsize(pdf_path),
+                       fields={"version": FIELD_EXTRACTOR_VERSION, "record": record.to_dict()})
+
+    def pdf_files(self):
+        """PDFs to parse; searchable `_ocr.pdf` copies are skipped when their original is present."""
+        files = [f for f in os.listdir(self.input_dir) if f.lower().endswith(".pdf")]
+        stems = {os.path.splitext(f)[0] for f in files}  # originals may end in .PDF
+        return [f for f in files
+                if not (f.endswith("_ocr.pdf") and f[:-len("_ocr.pdf")] in stems)]
+
+    def extract_text(self, pdf_path, max_pages=None, max_chars=None):
+        """Extract text, stopping after `max_pages` pages or `max_chars` characters."""
+        cached = self._from_cache(pdf_path, max_pages, max_chars)
+        if cached is not None:
+            return cached["text"]
+        doc = os.path.basename(pdf_path)
+        with metrics.stage("parse", doc=doc):
+            result = extract_pages(pdf_path, max_pages, max_chars)
+        metrics.count("pages_parsed", len(result["page_texts"]), stage="parse", doc=doc)
+        self._to_cache(pdf_path, result)
+        return budget_text(result["page_texts"], max_chars)
+
+    def iter_parallel(self, files=None, workers=None, max_pages=None, max_chars=None):
+        """
+        Extract PDFs in a process pool and yield each result as soon as it finishes.
+        Yields dicts with `file`, `text` and `pages` (pages actually read).
+        Cached documents are yielded first without touching the pool.
+        """
+        files = self.pdf_files() if files is None else files
+        pending = []
+        for f in files:
+            cached = self._from_cache(os.path.join(self.input_dir, f), max_pages, max_chars)
+            if cached is not None:
+                print(f"♻️  Cached {f}")
+                yield {"file": f, **cached}
+            else:
+                pending.append(f)
+        if not pending:
+            return
+
+        # One worker per core, but never more workers than documents.
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(extract_pages, os.path.join(self.input_dir, f), max_pages, max_chars): f
+                for f in pending
+            }
+            for fut in as_completed(futures):
+                file = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    print(f"⚠️ Parsing failed for {file}: {e}")
+                    continue
+                metrics.count("pages_parsed", len(result["page_texts"]), stage="parse", doc=file)
+                self._to_cache(os.path.join(self.input_dir, file), result)
+                print(f"📄 Parsed {file} ({len(result['page_texts'])} pages)")
+                yield {
+                    "file": file,
+                    "text": budget_text(result["page_texts"], max_chars),
+                    "pages": len(result["page_texts"]),
+                    "page_count": result["page_count"],
+                }
+
+    def _from_cache(self, pdf_path, max_pages, max_chars):
+        """Serve from the cache when the stored pages cover the requested budget."""
+        return self._pages_from(self._cache_record(pdf_path, field="pages"), max_pages, max_chars)
+
+    @staticmethod
+    def _pages_from(record, max_pages, max_chars):
+        if record is None or record["pages"] is None:
+            return None
+        page_texts = record["pages"]
+        covered = (
+            record["complete"]
+            or (max_pages is not None and len(page_texts) >= max_pages)
+            or (max_chars is not None and sum(map(len, page_texts)) >= max_chars)
+        )
+        if not covered:
+            return None
+        page_texts = apply_budget(page_texts, max_pages, max_chars)
+        return {
+            "text": budget_text(page_texts, max_chars),
+            "pages": len(page_texts),
+            "page_count": record["page_count"],
+        }
+
+    def _to_cache(self, pdf_path, result):
+        if self.cache is None:
+            return
+        self.cache.put(self.cache.digest(pdf_path), pdf_size=os.path.getsize(pdf_path),
+                       pages=result["page_texts"], page_count=result["page_count"],
+                       complete=result["complete"])
+
+
+def apply_budget(page_texts, max_pages=None, max_chars=None):
+    """Take pages in order until a page or character budget is reached."""
+    taken = []
+    chars = 0
+    for text in page_texts:
+        if max_pages is not None and len(taken) >= max_pages:
+            break
+        taken.append(text)
+        chars += len(text)
+        if max_chars is not None and chars >= max_chars:
+            break
+    return taken
+
+
+def budget_text(page_texts, max_chars=None):
+    text = "".join(page_texts)
+    return text if max_chars is None else text[:max_chars]
+
+
+def extract_pages(pdf_path, max_pages=None, max_chars=None):
+    """
+    Read page texts in order until a page or character budget is reached.
+    OCR'd documents are read from their text sidecar without opening the PDF.
+    Module-level so it can run inside a process pool.
+    """
+    sidecar_pages = read_sidecar_pages(pdf_path)
+    if sidecar_pages is not None:
+        page_texts = apply_budget(sidecar_pages, max_pages, max_chars)
+        return {
+            "page_texts": page_texts,
+            "page_count": len(sidecar_pages),
+            "complete": len(page_texts) == len(sidecar_pages),
+        }
+
+    with fitz.open(pdf_path) as doc:
+        page_texts = apply_budget((page.get_text("text") for page in doc), max_pages, max_chars)
+        page_count = doc.page_count
+    return {
+        "page_texts": page_texts,
+        "page_count": page_count,
+        "complete": len(page_texts) == page_count,
+    }
+
+
+def extract_document(pdf_path, field_extractor, max_chars=None):
+    """Page texts (as extract_pages) and the TenderRecord of one PDF; module-level for the process pool."""
+    result = extract_pages(pdf_path, max_chars=max_chars)
+    record = field_extractor.extract(iter_page_texts(pdf_path), file=os.path.basename(pdf_path))
+    return result, record
+
+
+def iter_page_texts(pdf_path):
+    """Lazily yield page texts (from the OCR sidecar when there is one); stops reading when the caller stops."""
+    sidecar_pages = read_sidecar_pages(pdf_path)
+    if sidecar_pages is not None:
+        yield from sidecar_pages
+        return
+    with fitz.open(pdf_path) as doc:
         for page in doc:
-            text += page.get_text("text")
-        doc.close()
-        return text
+            yield page.get_text("text")
@@ -0,0 +1,128 @@
+# agents/pipeline.py
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_POLL = 0.1  # seconds between stop checks while blocked on a queue
+
+
+def _put(q, item, stop):
+    """Put `item`, giving up (False) once `stop` is set."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q, stop):
+    """Next item, or _DONE once `stop` is set."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            pass
+    return _DONE
+
+
+class Stage:
+    """One pipeline step: `fn(value) -> value`, run by `workers` threads."""
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+
+
+class _Item:
+    __slots__ = ("source", "value", "error")
+
+    def __init__(self, source):
+        self.source = source
+        self.value = source
+        self.error = None
+
+
+class Pipeline:
+    """
+    Streaming runtime: stages are connected by bounded queues (`maxsize` each).
+    - A full queue blocks the stage feeding it, so a fast producer can't outrun the rest
+    - A failure in any stage is recorded on that item only; it skips the remaining stages
+    - Results are yielded as soon as an item leaves the last stage (completion order)
+    - If the consumer stops early (break, exception, closed generator), every stage
+      thread is told to stop and joined once its current item is finished
+    Yields {"source": input, "value": output} or {"source": input, "error": message}.
+    """
+
+    def __init__(self, stages, maxsize=8):
+        self.stages = stages
+        self.maxsize = maxsize
+
+    def run(self, source):
+        queues = [queue.Queue(maxsize=self.maxsize) for _ in range(len(self.stages) + 1)]
+        stop = threading.Event()
+        threads = [threading.Thread(target=self._feed, args=(source, queues[0], stop), daemon=True)]
+        for stage, inq, outq in zip(self.stages, queues, queues[1:]):
+            remaining = {"count": stage.workers, "lock": threading.Lock()}
+            for i in range(stage.workers):
+                threads.append(threading.Thread(target=self._work, args=(stage, inq, outq, remaining, stop),
+                                                name=f"{stage.name}-{i}", daemon=True))
+        for t in threads:
+            t.start()
+
+        out = queues[-1]
+        try:
+            while True:
+                item = out.get()
+                if item is _DONE:
+                    break
+                if item.error is None:
+                    yield {"source": item.source, "value": item.value}
+                else:
+                    yield {"source": item.source, "error": item.error}
+        finally:
+            # No-op after a normal finish; after an early exit, unblocks every stage thread.
+            stop.set()
+            for t in threads:
+                t.join()
+
+    @staticmethod
+    def _feed(source, outq, stop):
+        try:
+            for value in source:
+                if not _put(outq, _Item(value), stop):
+                    break
+        except Exception:
+            logger.exception("Pipeline source failed")
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+            _put(outq, _DONE, stop)
+
+    @staticmethod
+    def _work(stage, inq, outq, remaining, stop):
+        while True:
+            item = _get(inq, stop)
+            if item is _DONE:
+                if stop.is_set():
+                    return
+                with remaining["lock"]:
+                    remaining["count"] -= 1
+                    last = remaining["count"] == 0
+                # The last worker of a stage forwards the end marker; the others pass it on to siblings.
+                _put(outq if last else inq, _DONE, stop)
+                return
+            if item.error is None:
+                try:
+                    item.value = stage.fn(item.value)
+                except Exception as e:
+                    logger.exception("Stage %s failed for %s", stage.name, item.source)
+                    item.error = f"{stage.name}: {e}"
+            if not _put(outq, item, stop):
+                return
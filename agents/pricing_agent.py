@@ -1,5 +1,14 @@
+import numpy as np
 import pandas as pd
 import os
+from .amounts import NUMBER_RE, UNIT_MULTIPLIERS, parse_amount
+from .columnar_store import read_frame
+from .metrics import metrics
+from .report_agent import write_frame
+
+# Columns read from the hand-off tables; pricing never needs the tender text.
+MATCH_COLUMNS = ["Tender_File", "Product_Name", "Match_Score", "Base_Price", "Category"]
+FEE_COLUMNS = ["Filename", "Tender_Fee", "EMD"]
 
 class PricingAgent:
     """
@@ -10,60 +19,92 @@ class PricingAgent:
     def __init__(self,
                  matches_csv="data/matched_tenders.csv",
                  parsed_csv="data/parsed_rfps.csv",
-                 out_xlsx="data/bid_pricing.xlsx"):
-        if not os.path.exists(matches_csv):
-            raise FileNotFoundError("❌ Missing matched_tenders.csv")
-        if not os.path.exists(parsed_csv):
-            raise FileNotFoundError("❌ Missing parsed_rfps.csv")
-
-        self.matches = pd.read_csv(matches_csv)
-        self.parsed = pd.read_csv(parsed_csv)
+                 out_xlsx="data/bid_pricing.xlsx",
+                 store=None, crawl_date=None):
+        # With a TenderStore, read its `matches`/`parsed_rfps` tables; the text columns are never loaded.
+        if store is not None:
+            self.matches = read_frame(store, "matches", columns=MATCH_COLUMNS, crawl_date=crawl_date)
+            self.parsed = read_frame(store, "parsed_rfps", columns=FEE_COLUMNS,
+                                     crawl_date=crawl_date, dedupe_on="Filename")
+        else:
+            if not os.path.exists(matches_csv):
+                raise FileNotFoundError("❌ Missing matched_tenders.csv")
+            if not os.path.exists(parsed_csv):
+                raise FileNotFoundError("❌ Missing parsed_rfps.csv")
+            self.matches = pd.read_csv(matches_csv)
+            self.parsed = read_frame(parsed_csv, columns=FEE_COLUMNS)
         self.out_xlsx = out_xlsx
 
     def run(self, margin_pct=10):
-        results = []
-        for _, match in self.matches.iterrows():
-            tender_name = match["Tender_File"]
-            tender_meta = self.parsed[self.parsed["Filename"] == tender_name]
-
-            tender_fee = 0
-            emd = 0
-            if not tender_meta.empty:
-                fee_val = tender_meta.iloc[0].get("Tender_Fee", "")
-                emd_val = tender_meta.iloc[0].get("EMD", "")
-                tender_fee = extract_number(fee_val)
-                emd = extract_number(emd_val)
-
-            base_price = float(match.get("Base_Price", 0))
-            bid_price = base_price * (1 + margin_pct / 100)
-
-            total_estimate = bid_price + tender_fee + emd
-
-            results.append({
-                "Tender_File": tender_name,
-                "Product_Name": match["Product_Name"],
-                "Category": match["Category"],
-                "Match_Score": match["Match_Score"],
-                "Base_Price": base_price,
-                "Bid_Price": bid_price,
-                "Tender_Fee": tender_fee,
-                "EMD": emd,
-                "Total_Estimate": total_estimate
-            })
-
-        df = pd.DataFrame(results)
-        df.to_excel(self.out_xlsx, index=False)
+        """`margin_pct` may be a list, e.g. [5, 10, 15], for one Bid/Total column per scenario."""
+        df = price_matches(self.matches, self.parsed, margin_pct=margin_pct)
+        write_frame(self.out_xlsx, df, sheet_name="Bid_Pricing")
         print(f"✅ PricingAgent complete. Saved: {self.out_xlsx}")
         return df
 
 
+def price_matches(matches, parsed=None, margin_pct=10):
+    """
+    Price a matches frame against tender metadata (`Filename`, `Tender_Fee`, `EMD`).
+    Fees are parsed once per tender and attached with a single keyed join.
+    A list of margins adds `Bid_Price_<m>` / `Total_Estimate_<m>` columns per scenario.
+    """
+    with metrics.stage("price"):
+        df = _price_frame(matches, parsed, margin_pct)
+    metrics.count("rows_priced", len(df), stage="price")
+    return df
+
+
+def _price_frame(matches, parsed, margin_pct):
+    fees = tender_fees(parsed)
+    df = matches[["Tender_File", "Product_Name", "Category", "Match_Score"]].merge(
+        fees, how="left", left_on="Tender_File", right_index=True)
+    df[["Tender_Fee", "EMD"]] = df[["Tender_Fee", "EMD"]].fillna(0.0)
+    if "Base_Price" in matches.columns:
+        df["Base_Price"] = pd.to_numeric(matches["Base_Price"], errors="coerce").fillna(0.0).to_numpy()
+    else:
+        df["Base_Price"] = 0.0
+    fixed = df["Tender_Fee"] + df["EMD"]
+
+    if np.ndim(margin_pct) == 0:
+        df["Bid_Price"] = df["Base_Price"] * (1 + margin_pct / 100)
+        df["Total_Estimate"] = df["Bid_Price"] + fixed
+        bid_cols, total_cols = ["Bid_Price"], ["Total_Estimate"]
+    else:
+        bid_cols, total_cols = [], []
+        for m in margin_pct:
+            bid, total = f"Bid_Price_{m:g}", f"Total_Estimate_{m:g}"
+            df[bid] = df["Base_Price"] * (1 + m / 100)
+            df[total] = df[bid] + fixed
+            bid_cols.append(bid)
+            total_cols.append(total)
+
+    columns = (["Tender_File", "Product_Name", "Category", "Match_Score", "Base_Price"]
+               + bid_cols + ["Tender_Fee", "EMD"] + total_cols)
+    return df[columns].reset_index(drop=True)
+
+
+def tender_fees(parsed):
+    """One row per tender (indexed by Filename) with numeric Tender_Fee and EMD."""
+    if parsed is None or parsed.empty:
+        return pd.DataFrame(columns=["Tender_Fee", "EMD"], dtype=float,
+                            index=pd.Index([], dtype=object, name="Filename"))
+    meta = parsed.drop_duplicates("Filename", keep="first").set_index("Filename")
+    out = pd.DataFrame(index=meta.index)
+    for col in ("Tender_Fee", "EMD"):
+        out[col] = extract_numbers(meta[col]) if col in meta.columns else 0.0
+    return out
+
+
+def extract_numbers(series):
+    """Vectorized extract_number over a Series; unparseable values become 0."""
+    parts = series.astype(str).str.extract(NUMBER_RE)
+    values = pd.to_numeric(parts[0].str.replace(",", "", regex=False), errors="coerce")
+    multipliers = parts[1].str.lower().map(UNIT_MULTIPLIERS).fillna(1.0)
+    return (values * multipliers).fillna(0.0)
+
+
 def extract_number(text):
-    """Helper to extract numeric value from strings like 'Rs. 2000/-'."""
-    import re
-    try:
-        numbers = re.findall(r"[\d,]+", str(text))
-        if not numbers:
-            return 0
-        return float(numbers[0].replace(",", ""))
-    except Exception:
-        return 0
+    """Helper to extract numeric value from strings like 'Rs. 2000/-' or 'Rs. 1.5 Lakh'."""
+    value = parse_amount(text)
+    return 0 if value is None else value
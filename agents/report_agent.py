@@ -1,24 +1,179 @@
 # agents/report_agent.py
-import pandas as pd, logging
-from jinja2 import Environment, FileSystemLoader
-import xlsxwriter
+import hashlib
+import json
+import math
+import os
+import re
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from .metrics import metrics
 logger = logging.getLogger(__name__)
 
+# constant_memory streams each row to disk as soon as the next one starts.
+WORKBOOK_OPTIONS = {"constant_memory": True, "nan_inf_to_errors": True}
+
+
+def new_workbook(path):
+    import xlsxwriter  # only paid for when a workbook is actually written
+
+    return xlsxwriter.Workbook(path, WORKBOOK_OPTIONS)
+
 class ReportAgent:
     def __init__(self, out_dir="data/output"):
         self.out_dir = out_dir
 
-    def run(self, priced_payload, rfp_meta, company_meta, out_basename="proposal"):
-        items = priced_payload['items']
-        summary = priced_payload['summary']
-        excel_path = f"{self.out_dir}/{out_basename}.xlsx"
-        df = pd.DataFrame(items)
-        with pd.ExcelWriter(excel_path, engine='xlsxwriter') as writer:
-            # cover sheet
-            cover = pd.DataFrame([{"RFP Title": rfp_meta.get("title"), "Due Date": rfp_meta.get("due_date")}])
-            cover.to_excel(writer, sheet_name="Cover", index=False)
-            df.to_excel(writer, sheet_name="Price_Breakup", index=False)
-            summary_df = pd.DataFrame([summary])
-            summary_df.to_excel(writer, sheet_name="Summary", index=False)
+    def run(self, priced_payload, rfp_meta, company_meta, out_basename=None):
+        """Write one proposal workbook; without `out_basename` the name is derived from `rfp_meta`."""
+        out_basename = out_basename or proposal_basename(rfp_meta)
+        excel_path = os.path.join(self.out_dir, f"{out_basename}.xlsx")
+        with metrics.stage("report", doc=out_basename):
+            rows = write_proposal(excel_path, priced_payload, rfp_meta)
+        metrics.count("rows_written", rows, stage="report", doc=out_basename)
         # Optionally render PDF via HTML templates
         return {"status":"ok", "payload":{"excel": excel_path}}
+
+    def run_batch(self, jobs, workers=None, consolidated=None):
+        """
+        Write many proposals in parallel worker processes.
+        - jobs: dicts with "payload", "rfp_meta" and optionally "out_basename"
+        - consolidated: optional workbook path with one sheet per tender plus a roll-up Summary
+        Returns one result per job, in order.
+        """
+        # Identical rfp_meta (e.g. a re-posted tender) gives identical names; suffix repeats
+        # so no two workers ever write the same file.
+        basenames = unique_basenames(job.get("out_basename") or proposal_basename(job["rfp_meta"])
+                                     for job in jobs)
+        jobs = [{**job, "out_basename": name} for job, name in zip(jobs, basenames)]
+        if not jobs:
+            return []
+        os.makedirs(self.out_dir, exist_ok=True)
+        paths = [os.path.join(self.out_dir, f"{job['out_basename']}.xlsx") for job in jobs]
+        tasks = [(path, job["payload"], job["rfp_meta"]) for path, job in zip(paths, jobs)]
+        workers = workers or os.cpu_count() or 1
+
+        with metrics.stage("report_batch"):
+            if workers == 1 or len(jobs) == 1:
+                rows = [_write_task(task) for task in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                    rows = list(pool.map(_write_task, tasks,
+                                         chunksize=max(1, len(tasks) // (workers * 4))))
+            if consolidated:
+                write_consolidated(consolidated, jobs, paths)
+        metrics.count("proposals_written", len(jobs), stage="report_batch")
+        metrics.count("rows_written", sum(rows), stage="report_batch")
+        results = [{"status": "ok", "payload": {"excel": path}} for path in paths]
+        if consolidated:
+            for result in results:
+                result["payload"]["consolidated"] = consolidated
+        return results
+
+
+def slugify(text, max_len=40):
+    slug = re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")
+    return slug[:max_len].rstrip("-") or "proposal"
+
+
+def proposal_basename(rfp_meta):
+    """Readable and deterministic: slug of the title plus a hash of all RFP metadata."""
+    digest = hashlib.sha1(json.dumps(rfp_meta, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{slugify(rfp_meta.get('title') or rfp_meta.get('file') or 'proposal')}-{digest[:10]}"
+
+
+def unique_basenames(basenames):
+    """`basenames` with repeats suffixed -2, -3, ... (case-insensitively, for Windows/macOS)."""
+    seen = set()
+    names = []
+    for base in basenames:
+        name, n = base, 1
+        while name.lower() in seen:
+            n += 1
+            name = f"{base}-{n}"
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+
+def _cell(value):
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if hasattr(value, "item"):  # numpy scalars
+        return _cell(value.item())
+    return str(value)
+
+
+def write_records(worksheet, records, columns=None, start_row=0):
+    """Header plus one row per record, in order; returns the number of data rows."""
+    if columns is None:
+        columns = list(dict.fromkeys(key for record in records for key in record))
+    worksheet.write_row(start_row, 0, columns)
+    for i, record in enumerate(records, start=start_row + 1):
+        worksheet.write_row(i, 0, [_cell(record.get(c)) for c in columns])
+    return len(records)
+
+
+def write_proposal(path, priced_payload, rfp_meta):
+    """Cover, Price_Breakup and Summary sheets, streamed row by row; returns the item count."""
+    items = priced_payload["items"]
+    workbook = new_workbook(path)
+    try:
+        write_records(workbook.add_worksheet("Cover"),
+                      [{"RFP Title": rfp_meta.get("title"), "Due Date": rfp_meta.get("due_date")}])
+        write_records(workbook.add_worksheet("Price_Breakup"), items)
+        write_records(workbook.add_worksheet("Summary"), [priced_payload["summary"]])
+    finally:
+        workbook.close()
+    return len(items)
+
+
+def _write_task(task):
+    return write_proposal(*task)
+
+
+def write_frame(path, df, sheet_name="Sheet1"):
+    """Stream a DataFrame to a single-sheet workbook without building it in memory."""
+    workbook = new_workbook(path)
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, [str(c) for c in df.columns])
+        for i, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(i, 0, [_cell(v) for v in row])
+    finally:
+        workbook.close()
+    return path
+
+
+def sheet_names(basenames):
+    """Unique Excel-safe sheet names (31 chars, no []:*?/\\), avoiding the Summary sheet."""
+    seen = {"summary"}
+    names = []
+    for base in basenames:
+        base = re.sub(r"[\[\]:*?/\\]", "_", base)[:31] or "Tender"
+        name, n = base, 1
+        while name.lower() in seen:
+            n += 1
+            suffix = f"~{n}"
+            name = base[:31 - len(suffix)] + suffix
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+
+def write_consolidated(path, jobs, paths):
+    """One Price_Breakup sheet per tender plus a roll-up Summary sheet (first tab)."""
+    workbook = new_workbook(path)
+    try:
+        summary_rows = []
+        summary = workbook.add_worksheet("Summary")
+        for job, name, file_path in zip(jobs, sheet_names(j["out_basename"] for j in jobs), paths):
+            payload, rfp_meta = job["payload"], job["rfp_meta"]
+            write_records(workbook.add_worksheet(name), payload["items"])
+            summary_rows.append({"Sheet": name, "RFP Title": rfp_meta.get("title"),
+                                 "Due Date": rfp_meta.get("due_date"), **payload["summary"],
+                                 "File": file_path})
+        write_records(summary, summary_rows)
+    finally:
+        workbook.close()
+    return path
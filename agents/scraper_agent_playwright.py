@@ -1,76 +1,232 @@
-from playwright.sync_api import sync_playwright
-import os, time, fitz
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
+import asyncio, hashlib, os, threading, uuid
+from collections import defaultdict
+from contextlib import suppress
+from urllib.parse import urlparse
+from .extraction_cache import file_sha256
+from .metrics import metrics
 
-def download_pdf_playwright(pdf_url: str, out_dir: str = "data/rfps", headless: bool = True):
+# Playwright, PyMuPDF and the OCR stack are imported where they are used,
+# so importing this module (e.g. for file_name_for) stays cheap.
+
+def download_pdf_playwright(pdf_url: str, out_dir: str = "data/rfps", headless: bool = True, registry=None):
+    """
+    Downloads one PDF and applies OCR automatically if no text layer is found.
+    A one-URL PlaywrightDownloader run: the file is named by file_name_for(), or by
+    content hash with a DocRegistry. Returns the saved path or None.
     """
-    Downloads a PDF using Playwright and applies OCR automatically
-    if no text layer is found (for scanned tenders).
+    downloader = PlaywrightDownloader(out_dir=out_dir, headless=headless, concurrency=1, registry=registry)
+    return downloader.run([pdf_url])[pdf_url]
+
+
+class PlaywrightDownloader:
     """
+    Downloads many PDFs through one long-lived Firefox instance:
+    - Up to `concurrency` downloads in flight, at most `per_host` per host
+    - Browser pages are pooled and reused across downloads
+    - URLs that serve application/pdf directly are fetched over plain HTTP (no page)
+    - Per URL: the saved path, or None if fetching or storing failed (a failed OCR only warns)
+    With a CrawlLedger, the SHA-256 of every saved PDF is recorded against its URL.
+    Every download lands in `<out_dir>/.incoming/` first and is renamed into place when complete.
+    With a DocRegistry, PDFs are saved under their content hash, so the same document
+    behind several URLs is stored (and OCR'd) once; without one the name carries a hash of the URL.
+    Scanned PDFs are OCR'd by one OcrEngine shared by all downloads (`ocr_workers` processes).
+    """
+
+    def __init__(self, out_dir="data/rfps", headless=True, concurrency=8, per_host=2,
+                 timeout_ms=60000, ocr=True, ledger=None, registry=None, ocr_workers=None):
+        self.out_dir = out_dir
+        self.ledger = ledger
+        self.registry = registry
+        self.headless = headless
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout_ms = timeout_ms
+        self.ocr = ocr
+        self.ocr_workers = ocr_workers
+        self._ocr_engine = None
+        os.makedirs(out_dir, exist_ok=True)
+
+    async def __aenter__(self):
+        from playwright.async_api import async_playwright
 
-    os.makedirs(out_dir, exist_ok=True)
-    file_name = pdf_url.split("/")[-1].split("?")[0] or f"tender_{int(time.time())}.pdf"
-    save_path = os.path.join(out_dir, file_name)
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.firefox.launch(headless=self.headless)
+        self.context = await self.browser.new_context(accept_downloads=True)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self._idle_pages = []
+        if self.ocr:
+            from .ocr_engine import OcrEngine
 
-    with sync_playwright() as p:
-        browser = p.firefox.launch(headless=headless)
-        page = browser.new_page()
+            self._ocr_engine = OcrEngine(workers=self.ocr_workers)
+        return self
 
+    async def __aexit__(self, *exc):
+        await self.context.close()
+        await self.browser.close()
+        await self._playwright.stop()
+        if self._ocr_engine is not None:
+            self._ocr_engine.close()
+            self._ocr_engine = None
+
+    def run(self, urls):
+        """Blocking helper: download all `urls`, returning {url: path or None}."""
+        async def _run():
+            async with self:
+                return await self.download_all(urls)
+        return asyncio.run(_run())
+
+    def start(self):
+        """Run the browser on a background event loop so threads can call fetch()."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.__aenter__(), self._loop).result()
+        return self
+
+    def fetch(self, pdf_url):
+        """Thread-safe blocking download on the background loop started by start()."""
+        return asyncio.run_coroutine_threadsafe(self.download(pdf_url), self._loop).result()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.__aexit__(None, None, None), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def download_all(self, urls):
+        paths = await asyncio.gather(*(self.download(u) for u in urls))
+        return dict(zip(urls, paths))
+
+    async def download(self, pdf_url):
+        # Unique per download until the final name is known, so concurrent saves never collide.
+        incoming = os.path.join(self.out_dir, ".incoming")
+        os.makedirs(incoming, exist_ok=True)
+        part_path = os.path.join(incoming, f"{hashlib.sha1(pdf_url.encode()).hexdigest()}-{uuid.uuid4().hex[:8]}.part")
         try:
-            # ✅ Expect download (instead of page.goto)
-            with page.expect_download() as dl_info:
-                page.evaluate(f"window.open('{pdf_url}', '_blank')")
-            download = dl_info.value
-            download.save_as(save_path)
-            print(f"📄 Downloaded: {save_path}")
+            async with self._slots, self._host_slots[urlparse(pdf_url).netloc]:
+                try:
+                    # Awaits inside: thread CPU time would count other downloads' work.
+                    with metrics.stage("download", doc=pdf_url, clock="process"):
+                        try:
+                            fetched = await self._fetch_direct(pdf_url, part_path)
+                        except Exception:
+                            fetched = False  # let the browser try (cookies, JS redirects)
+                        if not fetched:
+                            await self._fetch_with_page(pdf_url, part_path)
+                    metrics.count("bytes_downloaded", os.path.getsize(part_path), stage="download", doc=pdf_url)
+                except Exception as e:
+                    print(f"❌ Failed to download {pdf_url}: {e}")
+                    return None
 
-            # Check if PDF has text
-            if not pdf_has_text(save_path):
-                print(f"🧠 Running OCR on {file_name} (scanned tender detected)...")
-                ocr_pdf(save_path)
-                print(f"✅ OCR complete for {file_name}")
+            # Errors stay per URL from here on: download_all gathers every URL's result.
+            is_new = True
+            sha = None
+            try:
+                if self.registry is not None:
+                    save_path, is_new = await asyncio.to_thread(
+                        self.registry.store_download, part_path, pdf_url, self.out_dir)
+                    sha = self.registry.sha_for_url(pdf_url)  # hashed by store_download
+                    if not is_new:
+                        print(f"♻️  {pdf_url} is already stored as {os.path.basename(save_path)}")
+                else:
+                    save_path = os.path.join(self.out_dir, file_name_for(pdf_url))
+                    os.replace(part_path, save_path)
+            except Exception as e:
+                print(f"❌ Failed to store {pdf_url}: {e}")
+                return None
+        finally:
+            # Failed or cancelled before the move: don't leave the partial file in .incoming.
+            with suppress(FileNotFoundError):
+                os.remove(part_path)
+        print(f"📄 Downloaded: {save_path}")
 
-            browser.close()
-            return save_path
+        if self.ledger is not None:
+            try:
+                sha = sha or await asyncio.to_thread(file_sha256, save_path)
+                self.ledger.record_pdf(pdf_url, content_hash=sha)
+            except Exception as e:
+                # The PDF is saved; it just stays unmatched in the ledger and is re-crawled.
+                print(f"⚠️ Could not record {pdf_url} in the crawl ledger: {e}")
 
-        except Exception as e:
-            print(f"❌ Failed to download {pdf_url}: {e}")
-            browser.close()
-            return None
+        if self.ocr and is_new and not await asyncio.to_thread(pdf_has_text, save_path):
+            print(f"🧠 Running OCR on {os.path.basename(save_path)} (scanned tender detected)...")
+            try:
+                await asyncio.to_thread(ocr_pdf, save_path, engine=self._ocr_engine)
+                print(f"✅ OCR complete for {os.path.basename(save_path)}")
+            except Exception as e:
+                print(f"⚠️ OCR failed for {os.path.basename(save_path)}: {e}")
+        return save_path
+
+    async def _fetch_direct(self, pdf_url, save_path):
+        """Plain HTTP GET through the browser context; True if the URL served a PDF."""
+        response = await self.context.request.get(pdf_url, timeout=self.timeout_ms,
+                                                  fail_on_status_code=False)
+        try:
+            content_type = response.headers.get("content-type", "")
+            if not response.ok or "application/pdf" not in content_type.lower():
+                return False
+            body = await response.body()
+        finally:
+            await response.dispose()
+        with open(save_path, "wb") as f:
+            f.write(body)
+        return True
+
+    async def _fetch_with_page(self, pdf_url, save_path):
+        page = self._idle_pages.pop() if self._idle_pages else await self.context.new_page()
+        popups = []
+        page.on("popup", popups.append)
+        try:
+            # ✅ Expect download (instead of page.goto)
+            async with page.expect_download(timeout=self.timeout_ms) as dl_info:
+                await page.evaluate("url => window.open(url, '_blank')", pdf_url)
+            download = await dl_info.value
+            await download.save_as(save_path)
+        finally:
+            page.remove_listener("popup", popups.append)
+            for popup in popups:
+                await popup.close()
+            self._idle_pages.append(page)
+
+
+def file_name_for(pdf_url):
+    """
+    Stable, per-URL file name: the URL basename plus a short hash of the full URL,
+    so different URLs ending in the same name (e.g. tender.pdf) never share a path.
+    """
+    digest = hashlib.sha1(pdf_url.encode()).hexdigest()[:12]
+    stem = os.path.splitext(pdf_url.split("/")[-1].split("?")[0])[0]
+    return f"{stem}-{digest}.pdf" if stem else f"tender_{digest}.pdf"
 
 
 def pdf_has_text(pdf_path):
     """Checks if the PDF already has text content."""
+    from .text_layer import probe_text_layer
+
     try:
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text("text")
-        doc.close()
-        return len(text.strip()) > 50
+        with metrics.stage("text_probe", doc=os.path.basename(pdf_path)):
+            return probe_text_layer(pdf_path, threshold=50)["has_text"]
     except Exception:
         return False
 
 
-def ocr_pdf(pdf_path):
-    """Runs OCR on a scanned PDF and replaces it with a text-searchable version."""
-    images = convert_from_path(pdf_path, dpi=300)
-    ocr_text = ""
-
-    for img in images:
-        ocr_text += pytesseract.image_to_string(img)
-
-    # Create a new searchable PDF
-    new_pdf = fitz.open()
-    page = new_pdf.new_page()
-    page.insert_text((50, 50), ocr_text[:5000])  # embed first chunk for searchability
-    new_path = pdf_path.replace(".pdf", "_ocr.pdf")
-    new_pdf.save(new_path)
-    new_pdf.close()
+def ocr_pdf(pdf_path, dpi=300, workers=None, engine=None):
+    """
+    Runs OCR on a scanned PDF and writes a searchable copy next to it
+    (`<name>_ocr.pdf` plus `.txt`/`.words.json` sidecars). The original scan is kept.
+    Pass a shared `engine` to reuse its worker pool; otherwise one is created for this call.
+    """
+    from .ocr_engine import OcrEngine
+    from .text_layer import ocr_output_path
 
-    # Replace old with OCR’d file
-    os.remove(pdf_path)
-    os.rename(new_path, pdf_path)
-    return pdf_path
+    new_path = ocr_output_path(pdf_path)
+    doc = os.path.basename(pdf_path)
+    with metrics.stage("ocr", doc=doc):
+        if engine is not None:
+            result = engine.make_searchable(pdf_path, new_path)
+        else:
+            with OcrEngine(workers=workers, dpi=dpi) as own_engine:
+                result = own_engine.make_searchable(pdf_path, new_path)
+    metrics.count("pages_ocrd", result["pages_ocrd"], stage="ocr", doc=doc)
+    return new_path
@@ -1,7 +1,9 @@
 # agents/scraper_agent.py
-import requests, time, random, logging
+import asyncio, hashlib, requests, time, random, logging
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from .crawl_engine import AsyncCrawler
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +18,9 @@ class ScraperAgent:
 
     def polite_get(self, url):
         try:
-            r = self.session.get(url, headers=self.headers, timeout=25)
+            with metrics.stage("scrape", doc=url):
+                r = self.session.get(url, headers=self.headers, timeout=25)
+            metrics.count("bytes_downloaded", len(r.content), stage="scrape", doc=url)
             if r.status_code in (403, 404):
                 logger.warning(f"Blocked or missing: {url} ({r.status_code})")
                 return ""
@@ -47,22 +51,139 @@ class ScraperAgent:
                 pdfs.append(urljoin(base_url, href))
         return list(set(pdfs))
 
+    def find_next_pages(self, html, base_url):
+        """Pagination links on a listing page (rel=next or "Next"/">" anchors)."""
+        soup = BeautifulSoup(html, "html.parser")
+        pages = []
+        for a in soup.find_all("a", href=True):
+            text = a.get_text(strip=True).lower()
+            rel = [r.lower() for r in a.get("rel", [])]
+            if "next" in rel or text in ("next", "next >", ">", ">>", "»"):
+                pages.append(urljoin(base_url, a["href"]))
+        return list(dict.fromkeys(pages))
+
     def run(self, portal_url="https://etenders.gov.in/eprocure/app?page=FrontEndLatestActiveTenders&service=page"):
+        all_rfps = list(self.iter_rfps(portal_url))
+        unique = {r["pdf_url"]: r for r in all_rfps}.values()
+        return {"status": "ok", "payload": list(unique)}
+
+    def iter_rfps(self, portal_url="https://etenders.gov.in/eprocure/app?page=FrontEndLatestActiveTenders&service=page",
+                  limit=10):
+        """Yield RFPs as each tender page is visited, so downstream stages can start early."""
         logger.info(f"🔍 Fetching tender list from {portal_url}")
         main_html = self.polite_get(portal_url)
         tender_pages = self.find_tender_pages(main_html, portal_url)
         logger.info(f"Found {len(tender_pages)} tender detail pages")
 
-        all_rfps = []
-        for t_url in tender_pages[:10]:  # limit for demo
+        seen = set()
+        for t_url in tender_pages[:limit]:  # limit for demo
             logger.info(f"➡️ Visiting tender: {t_url}")
             tender_html = self.polite_get(t_url)
             pdfs = self.find_pdf_links(tender_html, t_url)
             for pdf in pdfs:
-                all_rfps.append({
+                if pdf in seen:
+                    continue
+                seen.add(pdf)
+                yield {
                     "title": t_url.split("tnid=")[-1],
                     "pdf_url": pdf,
                     "source": t_url
-                })
+                }
+
+    def run_async(self, portal_url="https://etenders.gov.in/eprocure/app?page=FrontEndLatestActiveTenders&service=page",
+                  max_listing_pages=50, max_tenders=None, ledger=None, recheck_processed=False,
+                  **crawler_opts):
+        """Blocking wrapper around crawl(); `crawler_opts` are passed to AsyncCrawler."""
+        crawler = AsyncCrawler(headers=self.headers, session=self.session, **crawler_opts)
+        return asyncio.run(self.crawl(portal_url, crawler, max_listing_pages, max_tenders,
+                                      ledger=ledger, recheck_processed=recheck_processed))
+
+    async def crawl(self, portal_url, crawler, max_listing_pages=50, max_tenders=None,
+                    ledger=None, recheck_processed=False):
+        """
+        Crawl a whole portal: follow listing pagination, then fetch all tender
+        detail pages concurrently under the crawler's rate limits.
+        With a CrawlLedger the crawl is incremental:
+        - Tenders already processed are skipped (or, with recheck_processed=True,
+          re-fetched conditionally and re-read only if their content changed)
+        - Known PDFs are re-checked with a conditional HEAD
+        - Only new, changed or still unprocessed RFPs are emitted, tagged with
+          `change` = "new"/"changed"/"pending"
+        Nothing is marked processed here: call ledger.mark_pdf_processed() once a PDF
+        has been downloaded and parsed, so a failed run is retried by the next crawl.
+        """
+        tender_pages = []
+        seen_listings = set()
+        queue = [portal_url]
+        while queue and len(seen_listings) < max_listing_pages:
+            url = queue.pop(0)
+            if url in seen_listings:
+                continue
+            seen_listings.add(url)
+            logger.info(f"🔍 Fetching tender list from {url}")
+            html = await crawler.get_text(url)
+            tender_pages.extend(self.find_tender_pages(html, url))
+            queue.extend(u for u in self.find_next_pages(html, url) if u not in seen_listings)
+        tender_pages = list(dict.fromkeys(tender_pages))[:max_tenders]
+        logger.info(f"Found {len(tender_pages)} tender detail pages on {len(seen_listings)} listing pages")
+
+        async def visit(t_url):
+            if ledger is None:
+                tender_html = await crawler.get_text(t_url)
+                return [{
+                    "title": t_url.split("tnid=")[-1],
+                    "pdf_url": pdf,
+                    "source": t_url
+                } for pdf in self.find_pdf_links(tender_html, t_url)]
+            return await self._visit_incremental(t_url, crawler, ledger, recheck_processed)
+
+        all_rfps = [r for rfps in await asyncio.gather(*(visit(u) for u in tender_pages)) for r in rfps]
         unique = {r["pdf_url"]: r for r in all_rfps}.values()
         return {"status": "ok", "payload": list(unique)}
+
+    async def _visit_incremental(self, t_url, crawler, ledger, recheck_processed):
+        processed = ledger.is_processed(t_url)
+        if processed and not recheck_processed:
+            return []
+        headers = ledger.conditional_headers(t_url) if processed else None
+        r = await crawler.fetch(t_url, headers=headers)
+        if r is None or r.status_code in (403, 404):
+            return []
+        if r.status_code == 304:
+            ledger.touch(t_url)
+            return []
+        page_changed = ledger.record_page(t_url, etag=r.headers.get("ETag"),
+                                          last_modified=r.headers.get("Last-Modified"),
+                                          content_hash=hashlib.sha256(r.content).hexdigest())
+        if processed and not page_changed:
+            return []
+
+        rfps = []
+        for pdf in self.find_pdf_links(r.text, t_url):
+            change = await self._pdf_change(pdf, t_url, crawler, ledger)
+            if change:
+                rfps.append({
+                    "title": t_url.split("tnid=")[-1],
+                    "pdf_url": pdf,
+                    "source": t_url,
+                    "change": change
+                })
+        # A tender stays unprocessed until every PDF it links to has been processed downstream.
+        ledger.mark_processed(t_url, processed=not rfps)
+        return rfps
+
+    async def _pdf_change(self, pdf_url, t_url, crawler, ledger):
+        """ "new", "changed", "pending" or None for a PDF link, using a conditional HEAD for processed ones."""
+        if not ledger.has_pdf(pdf_url):
+            ledger.record_pdf(pdf_url, tender_url=t_url)
+            return "new"
+        if not ledger.is_pdf_processed(pdf_url):
+            return "pending"  # seen before, but an earlier run never finished it
+        r = await crawler.fetch(pdf_url, headers=ledger.conditional_headers(pdf_url, table="pdfs"),
+                                method="HEAD")
+        if r is None or r.status_code == 304:
+            ledger.touch(pdf_url, table="pdfs")
+            return None
+        changed = ledger.record_pdf(pdf_url, tender_url=t_url, etag=r.headers.get("ETag"),
+                                    last_modified=r.headers.get("Last-Modified"))
+        return "changed" if changed else None
@@ -0,0 +1,234 @@
+# agents/sku_catalogue.py
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+CATALOGUE_VERSION = 1
+ARRAYS = ("name_offsets", "norm_offsets", "prices", "category_codes", "row_hashes")
+BLOBS = ("names", "norm_names")  # UTF-8 bytes, sliced by the offsets above
+
+
+def normalize_name(name):
+    """Form the matcher scores against: lower-case, single-spaced."""
+    return " ".join(str(name).lower().split())
+
+
+def _blob(strings):
+    """UTF-8 concatenation of `strings` plus int64 offsets (len + 1)."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class MappedStrings:
+    """
+    Read-only sequence of strings over a UTF-8 blob + offsets, usually memory-mapped.
+    Strings are decoded on access, so the text itself stays in the shared page cache.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def take(self, rows):
+        """Object array of the strings at `rows`."""
+        rows = np.asarray(rows).ravel()
+        return np.fromiter((self[int(i)] for i in rows), dtype=object, count=len(rows))
+
+
+def _same_array(path, array):
+    """True if the .npy file at `path` holds exactly `array`."""
+    if not os.path.exists(path):
+        return False
+    old = np.load(path, mmap_mode="r")
+    return old.dtype == array.dtype and old.shape == array.shape and np.array_equal(old, array)
+
+
+def _diff(old_hashes, new_hashes):
+    """Row counts between two catalogue versions, matched by row content hash."""
+    old = np.empty(0, dtype=np.uint64) if old_hashes is None else old_hashes
+    unchanged = int(np.isin(new_hashes, old).sum())
+    return {"added": len(new_hashes) - unchanged,
+            "removed": int((~np.isin(old, new_hashes)).sum()),
+            "unchanged": unchanged}
+
+
+class SkuCatalogue:
+    """
+    Compact, memory-mapped form of products.csv for a resident matcher:
+    - Display and normalised names as UTF-8 blobs + offsets, float32 prices,
+      int32 codes into an interned category list, one hash per CSV row
+    - Stored under `<products.csv>.catalogue/gen-*/`; worker processes map the same
+      files, so the arrays are shared through the page cache instead of copied
+    - Display names are decoded per lookup. The normalised names are decoded once per
+      process into `names`, since every fuzzy match reads all of them as Python strings
+    - refresh() re-reads and hashes the CSV only when its mtime/size changed. If no row
+      changed, only the metadata is updated. Otherwise only new/changed rows are
+      normalised, files with unchanged content are hard-linked from the previous
+      generation, and the new generation is published atomically (readers keep the old one)
+    """
+
+    def __init__(self, products_csv="data/products.csv", root=None):
+        if not os.path.exists(products_csv):
+            raise FileNotFoundError("❌ Missing products.csv")
+        self.products_csv = products_csv
+        self.root = root or products_csv + ".catalogue"
+        self.meta = None
+        self.gen_dir = None
+        self.names = []  # normalised, what the matcher scores
+        self.display_names = MappedStrings(np.empty(0, dtype=np.uint8), np.zeros(1, dtype=np.int64))
+        self.categories = []
+        self._lock = threading.Lock()
+        if not self._load() or self.is_stale():
+            self.refresh()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _current_dir(self):
+        pointer = os.path.join(self.root, "CURRENT")
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer, encoding="utf-8") as f:
+            return os.path.join(self.root, f.read().strip())
+
+    def _load(self):
+        gen_dir = self._current_dir()
+        if gen_dir is None or not os.path.exists(os.path.join(gen_dir, "meta.json")):
+            return False
+        with open(os.path.join(gen_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != CATALOGUE_VERSION:
+            return False
+        self._set(gen_dir, meta)
+        return True
+
+    def _set(self, gen_dir, meta):
+        arrays = {name: np.load(os.path.join(gen_dir, f"{name}.npy"), mmap_mode="r") for name in ARRAYS + BLOBS}
+        self.gen_dir = gen_dir
+        self.meta = meta
+        self.prices = arrays["prices"]
+        self.category_codes = arrays["category_codes"]
+        self.row_hashes = arrays["row_hashes"]
+        self.categories = meta["categories"]
+        self.display_names = MappedStrings(arrays["names"], arrays["name_offsets"])
+        self.names = list(MappedStrings(arrays["norm_names"], arrays["norm_offsets"]))
+        # Built once per generation so category lookups per match are plain fancy indexing.
+        self._category_array = np.asarray(self.categories, dtype=object)
+
+    def is_stale(self):
+        st = os.stat(self.products_csv)
+        return self.meta is None or (self.meta["csv_mtime_ns"], self.meta["csv_size"]) != (st.st_mtime_ns, st.st_size)
+
+    def refresh(self):
+        """
+        Bring the catalogue up to date with the CSV.
+        Returns None if the CSV is unchanged, else {"added", "removed", "unchanged"} row counts.
+        """
+        with self._lock:
+            if not self.is_stale():
+                return None
+            old_hashes = None if self.meta is None else np.asarray(self.row_hashes)
+            # Another process may already have published the current generation.
+            if self._load() and not self.is_stale():
+                return _diff(old_hashes, np.asarray(self.row_hashes))
+            st = os.stat(self.products_csv)
+            products = pd.read_csv(self.products_csv)
+            hashes = pd.util.hash_pandas_object(products, index=False).to_numpy(dtype=np.uint64)
+
+            if self.meta is not None and np.array_equal(hashes, self.row_hashes):
+                # Touched but no row changed: keep the arrays, move only the CSV fingerprint.
+                meta = dict(self.meta, csv_mtime_ns=st.st_mtime_ns, csv_size=st.st_size)
+                self._write_meta(self.gen_dir, meta)
+                self.meta = meta
+                return _diff(old_hashes, hashes)
+
+            # Rows whose content is unchanged keep their normalised name; only the rest are processed.
+            previous = {} if self.meta is None else {int(h): i for i, h in enumerate(self.row_hashes)}
+            old_rows = [previous.get(int(h)) for h in hashes]
+            display = products["Product_Name"].astype(str).tolist()
+            names = [self.names[i] if i is not None else normalize_name(display[j])
+                     for j, i in enumerate(old_rows)]
+
+            category = products["Category"] if "Category" in products.columns else pd.Series("Unknown", index=products.index)
+            codes, categories = pd.factorize(category.fillna("Unknown").astype(str))
+            price = products["Base_Price"] if "Base_Price" in products.columns else pd.Series(0, index=products.index)
+            prices = pd.to_numeric(price, errors="coerce").fillna(0.0).to_numpy(dtype=np.float32)
+
+            meta = {"version": CATALOGUE_VERSION, "csv_mtime_ns": st.st_mtime_ns, "csv_size": st.st_size,
+                    "rows": len(products), "categories": categories.tolist()}
+            name_blob, name_offsets = _blob(display)
+            norm_blob, norm_offsets = _blob(names)
+            arrays = {"name_offsets": name_offsets, "norm_offsets": norm_offsets, "prices": prices,
+                      "category_codes": codes.astype(np.int32), "row_hashes": hashes,
+                      "names": name_blob, "norm_names": norm_blob}
+            self._set(self._publish(meta, arrays), meta)
+        return _diff(old_hashes, hashes)
+
+    @staticmethod
+    def _write_meta(gen_dir, meta):
+        path = os.path.join(gen_dir, "meta.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _publish(self, meta, arrays):
+        """Write a new generation directory, then switch CURRENT to it in one rename."""
+        gen = f"gen-{time.time_ns()}-{os.getpid()}"
+        gen_dir = os.path.join(self.root, gen)
+        os.makedirs(gen_dir)
+        for name, array in arrays.items():
+            path = os.path.join(gen_dir, f"{name}.npy")
+            if self.gen_dir is not None and _same_array(os.path.join(self.gen_dir, f"{name}.npy"), array):
+                # Same inode as the previous generation, so its pages stay shared in the page cache.
+                try:
+                    os.link(os.path.join(self.gen_dir, f"{name}.npy"), path)
+                    continue
+                except OSError:
+                    pass  # no hard links on this filesystem
+            np.save(path, array)
+        self._write_meta(gen_dir, meta)
+
+        pointer = os.path.join(self.root, "CURRENT")
+        previous = self._current_dir()
+        tmp_pointer = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp_pointer, "w", encoding="utf-8") as f:
+            f.write(gen)
+        os.replace(tmp_pointer, pointer)
+        # Keep the generation just replaced for processes still mapping it; drop older ones.
+        keep = {gen_dir, previous}
+        for old in glob.glob(os.path.join(self.root, "gen-*")):
+            if old not in keep:
+                shutil.rmtree(old, ignore_errors=True)
+        return gen_dir
+
+    def display_name_of(self, rows):
+        return self.display_names.take(rows)
+
+    def category_of(self, rows):
+        return self._category_array[self.category_codes[rows]]
+
+    def to_frame(self):
+        """Product_Name / Category / Base_Price frame, for the token index and TF-IDF retriever."""
+        rows = np.arange(len(self.names))
+        return pd.DataFrame({"Product_Name": list(self.display_names), "Category": self.category_of(rows),
+                             "Base_Price": np.asarray(self.prices)})
@@ -0,0 +1,149 @@
+# agents/sku_index.py
+import os
+import pickle
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from .extraction_cache import file_sha256
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+INDEX_VERSION = 1
+
+
+def tokenize(text, min_len=2):
+    """Lower-case word tokens used for both indexing and lookup."""
+    return {t for t in TOKEN_RE.findall(str(text).lower()) if len(t) >= min_len}
+
+
+class CsvCache:
+    """
+    Base for lookup structures derived from products.csv and pickled next to it.
+    - Saved as `<products.csv><SUFFIX>`, replaced atomically
+    - Rebuilt only when the CSV mtime changes *and* its SHA-256 differs
+    - Built from a SkuCatalogue instead, see for_catalogue()
+    Subclasses set SUFFIX, VERSION and LABEL and implement build(), _state() and _from_state().
+    """
+
+    SUFFIX = ""
+    VERSION = 1
+    LABEL = ""
+
+    def __init__(self, csv_mtime, csv_sha256):
+        self.csv_mtime = csv_mtime
+        self.csv_sha256 = csv_sha256
+
+    @classmethod
+    def build(cls, products, csv_mtime=None, csv_sha256=None):
+        raise NotImplementedError
+
+    def _state(self):
+        raise NotImplementedError
+
+    @classmethod
+    def _from_state(cls, state):
+        raise NotImplementedError
+
+    @classmethod
+    def load_or_build(cls, products, products_csv):
+        """Load the on-disk copy for `products_csv`, rebuilding it if the CSV changed."""
+        path = products_csv + cls.SUFFIX
+        mtime = os.path.getmtime(products_csv)
+        cached = cls._load(path)
+        if cached is not None:
+            if cached.csv_mtime == mtime:
+                return cached
+            sha = file_sha256(products_csv)
+            if cached.csv_sha256 == sha:
+                # Touched but unchanged: refresh the stored mtime only.
+                cached.csv_mtime = mtime
+                cached.save(path)
+                return cached
+        else:
+            sha = file_sha256(products_csv)
+
+        print(f"🗂️  Building {cls.LABEL} for {products_csv}...")
+        built = cls.build(products, csv_mtime=mtime, csv_sha256=sha)
+        built.save(path)
+        return built
+
+    @classmethod
+    def for_catalogue(cls, catalogue):
+        """
+        Load or build the copy for a SkuCatalogue's current generation, stored inside it.
+        Generations are immutable, so no CSV fingerprint is involved: products.csv may
+        already hold newer rows than the catalogue the structure is built from.
+        """
+        path = os.path.join(catalogue.gen_dir, "derived" + cls.SUFFIX)
+        cached = cls._load(path)
+        if cached is not None:
+            return cached
+        print(f"🗂️  Building {cls.LABEL} for {catalogue.gen_dir}...")
+        built = cls.build(catalogue.to_frame())
+        built.save(path)
+        return built
+
+    @classmethod
+    def _load(cls, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception:
+            return None
+        if state.get("version") != cls.VERSION:
+            return None
+        return cls._from_state(state)
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # processes may save the same file concurrently
+        state = dict(self._state(), version=self.VERSION,
+                     csv_mtime=self.csv_mtime, csv_sha256=self.csv_sha256)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+class SkuIndex(CsvCache):
+    """
+    Token inverted index over `Product_Name` and `Category` of products.csv.
+    - Persisted next to the CSV as `<products.csv>.idx` (see CsvCache)
+    """
+
+    SUFFIX = ".idx"
+    VERSION = INDEX_VERSION
+    LABEL = "SKU index"
+
+    def __init__(self, postings, csv_mtime, csv_sha256):
+        super().__init__(csv_mtime, csv_sha256)
+        self.postings = postings
+
+    @classmethod
+    def build(cls, products, csv_mtime=None, csv_sha256=None):
+        postings = defaultdict(list)
+        names = products["Product_Name"].astype(str).tolist()
+        if "Category" in products.columns:
+            categories = products["Category"].astype(str).tolist()
+        else:
+            categories = [""] * len(names)
+        for row, (name, category) in enumerate(zip(names, categories)):
+            for tok in tokenize(name) | tokenize(category):
+                postings[tok].append(row)
+        postings = {tok: np.asarray(rows, dtype=np.int32) for tok, rows in postings.items()}
+        return cls(postings, csv_mtime, csv_sha256)
+
+    def _state(self):
+        return {"postings": self.postings}
+
+    @classmethod
+    def _from_state(cls, state):
+        return cls(state["postings"], state["csv_mtime"], state["csv_sha256"])
+
+    def candidates(self, text):
+        """Sorted row ids of SKUs sharing at least one token with `text`."""
+        hits = [self.postings[t] for t in tokenize(text) if t in self.postings]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(hits))
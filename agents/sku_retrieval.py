@@ -0,0 +1,108 @@
+# agents/sku_retrieval.py
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .sku_index import CsvCache
+from .technical_agent import keep_top_k
+
+RETRIEVER_VERSION = 1
+
+
+def sku_texts(products):
+    """Name, plus description and category where the catalogue has them."""
+    text = products["Product_Name"].fillna("").astype(str)
+    for column in ("Description", "Category"):
+        if column in products.columns:
+            text = text + " " + products[column].fillna("").astype(str)
+    return text.str.lower().tolist()
+
+
+def split_segments(text, max_chars=300, min_chars=3):
+    """Lines of `text`, long lines cut into `max_chars` pieces; each becomes one query."""
+    for line in str(text).splitlines():
+        line = line.strip()
+        for start in range(0, len(line), max_chars):
+            piece = line[start:start + max_chars]
+            if len(piece) >= min_chars:
+                yield piece
+
+
+def top_k_sparse(scores, k):
+    """(row, col, value) of the k largest stored values in each row of a sparse matrix."""
+    coo = scores.tocoo()
+    return keep_top_k(coo.row, coo.col, coo.data, k)
+
+
+class SkuRetriever(CsvCache):
+    """
+    Candidate generation for SKU matching with TF-IDF character n-grams.
+    - SKU names (+ description/category) are embedded once, L2-normalised
+    - Tender texts are split into lines and queried in batches; cosine scores are
+      one sparse matrix product per batch, touching only SKUs sharing an n-gram
+    - Persisted next to the CSV as `<products.csv>.tfidf` (see CsvCache)
+    """
+
+    SUFFIX = ".tfidf"
+    VERSION = RETRIEVER_VERSION
+    LABEL = "TF-IDF SKU retriever"
+
+    def __init__(self, vectorizer, matrix, csv_mtime, csv_sha256):
+        super().__init__(csv_mtime, csv_sha256)
+        self.vectorizer = vectorizer
+        self.matrix_t = matrix.T.tocsr()  # n-grams x SKUs: rows are posting lists
+
+    @classmethod
+    def build(cls, products, csv_mtime=None, csv_sha256=None, ngram_range=(3, 4)):
+        vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=ngram_range,
+                                     sublinear_tf=True, dtype=np.float32)
+        matrix = vectorizer.fit_transform(sku_texts(products))
+        return cls(vectorizer, matrix, csv_mtime, csv_sha256)
+
+    def _state(self):
+        return {"vectorizer": self.vectorizer, "matrix_t": self.matrix_t}
+
+    @classmethod
+    def _from_state(cls, state):
+        return cls(state["vectorizer"], state["matrix_t"].T, state["csv_mtime"], state["csv_sha256"])
+
+    def retrieve(self, tender_texts, top_k=20, batch_size=512, min_similarity=0.1):
+        """
+        Top-K SKUs per tender by cosine similarity of its best-matching line.
+        Returns (tender_idx, sku_idx, similarity, passages), row-major with the best
+        candidate first; passages[i] is the tender line that retrieved pair i.
+        """
+        segments, owners = [], []
+        for i, text in enumerate(tender_texts):
+            for piece in split_segments(text):
+                segments.append(piece)
+                owners.append(i)
+        owners = np.asarray(owners, dtype=np.intp)
+
+        rows, cols, sims, segs = [], [], [], []
+        for start in range(0, len(segments), batch_size):
+            queries = self.vectorizer.transform(segments[start:start + batch_size])
+            scores = (queries @ self.matrix_t).tocsr()
+            scores.data[scores.data < min_similarity] = 0
+            scores.eliminate_zeros()
+            r, c, s = top_k_sparse(scores, top_k)
+            rows.append(owners[start + r])
+            cols.append(c)
+            sims.append(s)
+            segs.append(start + r)
+        if not rows:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, np.empty(0, dtype=np.float32), []
+
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        sims, segs = np.concatenate(sims), np.concatenate(segs)
+        # One pair per (tender, SKU): keep the line with the highest similarity.
+        order = np.lexsort((-sims, cols, rows))
+        rows, cols, sims, segs = rows[order], cols[order], sims[order], segs[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, sims, segs = rows[first], cols[first], sims[first], segs[first]
+
+        # Best first within each tender; keep_top_k preserves that order.
+        order = np.lexsort((-sims, rows))
+        _, keep, _ = keep_top_k(rows[order], order, sims[order], top_k)
+        return rows[keep], cols[keep], sims[keep], [segments[j] for j in segs[keep]]
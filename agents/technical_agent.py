@@ -1,6 +1,10 @@
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 import os
+from .columnar_store import read_frame
+from .metrics import metrics
+from .sku_index import SkuIndex
 
 class TechnicalAgent:
     """
@@ -8,34 +12,202 @@ class TechnicalAgent:
     using fuzzy matching and keyword-based relevance scoring.
     """
 
-    def __init__(self, parsed_csv="data/parsed_rfps.csv", products_csv="data/products.csv"):
-        if not os.path.exists(parsed_csv):
+    def __init__(self, parsed_csv="data/parsed_rfps.csv", products_csv="data/products.csv",
+                 store=None, crawl_date=None, catalogue=None):
+        # parsed_csv=None: no batch input, tenders are passed to match() directly.
+        # With a TenderStore, parsed tenders are read from its `parsed_rfps` table instead.
+        # With a SkuCatalogue, SKUs come from its memory-mapped arrays instead of products.csv.
+        if store is None and parsed_csv is not None and not os.path.exists(parsed_csv):
             raise FileNotFoundError("❌ Missing parsed_rfps.csv")
         if not os.path.exists(products_csv):
             raise FileNotFoundError("❌ Missing products.csv")
 
-        self.rfps = pd.read_csv(parsed_csv)
-        self.products = pd.read_csv(products_csv)
-
-    def run(self, threshold=40):
-        results = []
-        for _, row in self.rfps.iterrows():
-            tender_name = row["Filename"]
-            tender_text = str(row.get("Extracted_Text", "")).lower()
-
-            for _, prod in self.products.iterrows():
-                product_name = str(prod["Product_Name"]).lower()
-                score = fuzz.token_set_ratio(product_name, tender_text)
-                if score >= threshold:
-                    results.append({
-                        "Tender_File": tender_name,
-                        "Product_Name": prod["Product_Name"],
-                        "Match_Score": score,
-                        "Base_Price": prod.get("Base_Price", 0),
-                        "Category": prod.get("Category", "Unknown")
-                    })
-        df = pd.DataFrame(results)
+        if store is not None:
+            self.rfps = read_frame(store, "parsed_rfps", columns=PARSED_COLUMNS,
+                                   crawl_date=crawl_date, dedupe_on="Filename")
+        else:
+            self.rfps = pd.read_csv(parsed_csv) if parsed_csv is not None else None
+        self.products_csv = products_csv
+        self.catalogue = catalogue
+        self.reload_catalogue()
+
+    def reload_catalogue(self):
+        """Pick up the catalogue's current rows; the token index and retriever are rebuilt on next use."""
+        self._index = None
+        self._retriever = None
+        if self.catalogue is not None:
+            self.products = None
+            self.product_names = self.catalogue.names
+            return
+        self.products = pd.read_csv(self.products_csv)
+        # Normalise the catalogue once; every tender is scored against this list.
+        self.product_names = self.products["Product_Name"].astype(str).str.lower().tolist()
+
+    def run(self, threshold=40, workers=-1, method="cdist", top_k=None):
+        # Duplicates whose first copy is in this batch reuse its matches instead of being scored.
+        first_copy = column_or_default(self.rfps, "Duplicate_Of", None)
+        reuse = first_copy.notna() & first_copy.isin(self.rfps["Filename"])
+        rfps = self.rfps[~reuse]
+        tender_names = rfps["Filename"].tolist()
+        # Match on the spec sections when the parser found them, else on the extracted text.
+        text = column_or_default(rfps, "Extracted_Text", "").astype(str)
+        spec = column_or_default(rfps, "Spec_Text", "").fillna("").astype(str)
+        tender_texts = spec.where(spec.str.strip() != "", text).str.lower().tolist()
+
+        df = self.match(tender_names, tender_texts, threshold=threshold,
+                        workers=workers, method=method, top_k=top_k)
+        if reuse.any():
+            links = pd.DataFrame({"Filename": self.rfps.loc[reuse, "Filename"],
+                                  "Duplicate_Of": first_copy[reuse]})
+            copies = links.merge(df, left_on="Duplicate_Of", right_on="Tender_File")
+            copies["Tender_File"] = copies["Filename"]
+            df = pd.concat([df, copies[MATCH_COLUMNS]], ignore_index=True)
         out_path = "data/matched_tenders.csv"
         #df.to_csv(out_path, index=False)
         print(f"✅ TechnicalAgent complete. Saved matches to {out_path}")
         return df
+
+    @property
+    def index(self):
+        """Inverted token index over the catalogue, loaded from disk on first use."""
+        if self._index is None:
+            self._index = self._load_derived(SkuIndex)
+        return self._index
+
+    @property
+    def retriever(self):
+        """TF-IDF char n-gram retriever over the catalogue, loaded from disk on first use."""
+        if self._retriever is None:
+            from .sku_retrieval import SkuRetriever  # scikit-learn, only for method="tfidf"
+
+            self._retriever = self._load_derived(SkuRetriever)
+        return self._retriever
+
+    def _load_derived(self, cls):
+        # Keyed on the catalogue generation whose rows are matched, not on products.csv,
+        # which may already have changed before the next reload.
+        if self.catalogue is not None:
+            return cls.for_catalogue(self.catalogue)
+        return cls.load_or_build(self.products, self.products_csv)
+
+    def prepare(self, method="cdist"):
+        """Load (or build) what `method` needs now, so the first match() doesn't pay for it."""
+        if method == "index":
+            return self.index
+        if method == "tfidf":
+            return self.retriever
+        return None
+
+    def match(self, tender_names, tender_texts, threshold=40, workers=-1, method="cdist", top_k=None):
+        """
+        Match lower-cased tender texts against the catalogue.
+        - method="cdist": score every tender x SKU pair in one native call
+        - method="index": score only SKUs sharing a token with the tender
+        - method="tfidf": retrieve candidates by char n-gram similarity, rerank with the fuzzy score
+        `top_k` keeps the best K matches per tender. `workers=-1` uses all cores.
+        """
+        with metrics.stage("match"):
+            if method == "cdist":
+                rows, cols, scores = match_batch(tender_texts, self.product_names,
+                                                 threshold=threshold, workers=workers)
+                metrics.count("pairs_scored", len(tender_texts) * len(self.product_names), stage="match")
+            elif method == "index":
+                rows, cols, scores = self._match_indexed(tender_texts, threshold)
+            elif method == "tfidf":
+                rows, cols, scores = self._match_tfidf(tender_texts, threshold, top_k or TFIDF_CANDIDATES)
+            else:
+                raise ValueError(f"Unknown match method: {method}")
+
+        if top_k is not None:
+            rows, cols, scores = keep_top_k(rows, cols, scores, top_k)
+        return self._build_matches(tender_names, rows, cols, scores)
+
+    def _match_indexed(self, tender_texts, threshold):
+        rows, cols, scores = [], [], []
+        for i, text in enumerate(tender_texts):
+            shortlist = self.index.candidates(text)
+            if not len(shortlist):
+                continue
+            choices = [self.product_names[j] for j in shortlist]
+            metrics.count("pairs_scored", len(choices), stage="match")
+            for _, score, k in process.extract(text, choices, scorer=fuzz.token_set_ratio, processor=None,
+                                               score_cutoff=threshold, limit=None):
+                rows.append(i)
+                cols.append(shortlist[k])
+                scores.append(score)
+        order = np.lexsort((np.asarray(cols, dtype=np.intp), np.asarray(rows, dtype=np.intp)))
+        return (np.asarray(rows, dtype=np.intp)[order],
+                np.asarray(cols, dtype=np.intp)[order],
+                np.asarray(scores, dtype=float)[order])
+
+    def _match_tfidf(self, tender_texts, threshold, candidates):
+        rows, cols, _, passages = self.retriever.retrieve(tender_texts, top_k=candidates)
+        metrics.count("pairs_scored", len(rows), stage="match")
+        # Rerank on the line that retrieved the SKU, not the whole tender text.
+        scores = np.fromiter((fuzz.token_set_ratio(p, self.product_names[c], processor=None)
+                              for p, c in zip(passages, cols.tolist())),
+                             dtype=float, count=len(rows))
+        keep = scores >= threshold
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+        order = np.lexsort((-scores, rows))
+        return rows[order], cols[order], scores[order]
+
+    def _build_matches(self, tender_names, rows, cols, scores):
+        if self.catalogue is not None:
+            return pd.DataFrame({
+                "Tender_File": np.asarray(tender_names, dtype=object)[rows],
+                "Product_Name": self.catalogue.display_name_of(cols),
+                "Match_Score": np.asarray(scores, dtype=float),
+                "Base_Price": np.asarray(self.catalogue.prices[cols], dtype=float),
+                "Category": self.catalogue.category_of(cols),
+            }, columns=MATCH_COLUMNS)
+        prods = self.products.iloc[cols]
+        return pd.DataFrame({
+            "Tender_File": np.asarray(tender_names, dtype=object)[rows],
+            "Product_Name": prods["Product_Name"].to_numpy(),
+            "Match_Score": np.asarray(scores, dtype=float),
+            "Base_Price": column_or_default(prods, "Base_Price", 0).to_numpy(),
+            "Category": column_or_default(prods, "Category", "Unknown").to_numpy(),
+        }, columns=MATCH_COLUMNS)
+
+
+MATCH_COLUMNS = ["Tender_File", "Product_Name", "Match_Score", "Base_Price", "Category"]
+PARSED_COLUMNS = ["Filename", "Extracted_Text", "Spec_Text", "Duplicate_Of"]
+TFIDF_CANDIDATES = 20  # SKUs retrieved per tender for reranking when top_k is not given
+
+
+def match_batch(queries, choices, threshold=40, workers=-1):
+    """
+    Score the full queries x choices matrix with `fuzz.token_set_ratio`.
+    Returns (query_idx, choice_idx, score) arrays for every pair >= threshold,
+    ordered query-major like the original nested loop. Scores are float64, the same
+    values (and threshold decisions) as calling the scorer pair by pair.
+    """
+    if not len(queries) or not len(choices):
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0, dtype=float)
+
+    scores = process.cdist(queries, choices, scorer=fuzz.token_set_ratio,
+                           score_cutoff=threshold, dtype=np.float64, workers=workers)
+    rows, cols = np.nonzero(scores >= threshold)
+    return rows, cols, scores[rows, cols]
+
+
+def keep_top_k(rows, cols, scores, k):
+    """Keep the `k` highest-scoring pairs per query row, preserving row-major order."""
+    if not len(rows):
+        return rows, cols, scores
+    # Sort by row, then by descending score, and rank within each row.
+    order = np.lexsort((-scores, rows))
+    sorted_rows = rows[order]
+    starts = np.searchsorted(sorted_rows, sorted_rows, side="left")
+    rank = np.arange(len(sorted_rows)) - starts
+    keep = np.sort(order[rank < k])
+    return rows[keep], cols[keep], scores[keep]
+
+
+def column_or_default(df, column, default):
+    """Return df[column], or a Series filled with `default` when the column is absent."""
+    if column in df.columns:
+        return df[column]
+    return pd.Series(default, index=df.index)
@@ -0,0 +1,68 @@
+# agents/text_layer.py
+import os
+
+import fitz
+
+
+def probe_text_layer(pdf_path, threshold=30, min_page_chars=10, coverage=False):
+    """
+    Decide whether a PDF has a usable text layer.
+    - Stops at the first page where the running character count crosses `threshold`
+    - With coverage=True every page is checked and pages with fewer than
+      `min_page_chars` characters are reported as image-only
+    Returns {"has_text", "pages_scanned", "page_count", "image_pages"}.
+    """
+    chars = 0
+    scanned = 0
+    image_pages = []
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+        for i, page in enumerate(doc):
+            text = page.get_text("text").strip()
+            chars += len(text)
+            scanned += 1
+            if len(text) < min_page_chars:
+                image_pages.append(i)
+            if not coverage and chars > threshold:
+                break
+    return {
+        "has_text": chars > threshold,
+        "pages_scanned": scanned,
+        "page_count": page_count,
+        "image_pages": image_pages if coverage else None,
+    }
+
+
+def ocr_output_path(pdf_path, out_dir=None):
+    """`<name>_ocr.pdf` for `pdf_path` (any extension case), in `out_dir` or next to the scan."""
+    stem = os.path.splitext(pdf_path)[0]
+    if out_dir is not None:
+        stem = os.path.join(out_dir, os.path.basename(stem))
+    return stem + "_ocr.pdf"
+
+
+def sidecar_paths(ocr_path):
+    """Plain-text and JSON word-box files written next to a searchable `_ocr.pdf`."""
+    stem = os.path.splitext(ocr_path)[0]
+    return stem + ".txt", stem + ".words.json"
+
+
+def sidecar_text_path(pdf_path):
+    """
+    Path of an up-to-date OCR text sidecar for `pdf_path` (either the
+    searchable `_ocr.pdf` itself or the original scan next to it), or None.
+    """
+    stem = os.path.splitext(pdf_path)[0]
+    text_path = stem + ".txt" if stem.endswith("_ocr") else stem + "_ocr.txt"
+    if os.path.exists(text_path) and os.path.getmtime(text_path) >= os.path.getmtime(pdf_path):
+        return text_path
+    return None
+
+
+def read_sidecar_pages(pdf_path):
+    """Page texts from the OCR sidecar for `pdf_path`, or None if there is none."""
+    text_path = sidecar_text_path(pdf_path)
+    if text_path is None:
+        return None
+    with open(text_path, encoding="utf-8") as f:
+        return f.read().split("\f")
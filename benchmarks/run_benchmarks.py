@@ -0,0 +1,249 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmark harness for the agents, run on synthetic inputs generated offline.
+
+    python -m benchmarks.run_benchmarks                      # full scales
+    python -m benchmarks.run_benchmarks --quick              # small scales
+    python -m benchmarks.run_benchmarks --save-baseline      # store results as the baseline
+
+Results go to benchmarks/results.json and are compared with benchmarks/baseline.json.
+Timings are machine-specific, so no baseline ships with the repo: record one with
+--save-baseline on the machine that will run the comparison (commit it if that is CI).
+Exit codes: 0 ok, 1 a benchmark is slower than baseline by more than --threshold,
+2 no baseline to compare with (pass --allow-missing-baseline to just record results).
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from . import synth
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+FULL_SCALES = {
+    "pages": [1, 20, 100],
+    "ocr_pages": [1, 5],
+    "catalogue": [1000, 10000, 100000],
+    "tenders": 20,
+    "matches": [1000, 10000, 100000],
+    "report_rows": [1000, 10000, 100000],
+    "proposals": 200,
+}
+QUICK_SCALES = {
+    "pages": [1, 10],
+    "ocr_pages": [1],
+    "catalogue": [1000, 5000],
+    "tenders": 5,
+    "matches": [1000],
+    "report_rows": [1000],
+    "proposals": 20,
+}
+
+
+def best_of(fn, repeat):
+    """Minimum wall time over `repeat` runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def write_matches_csv(path, rows, tenders, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Tender_File", "Product_Name", "Match_Score", "Base_Price", "Category"])
+        for _ in range(rows):
+            writer.writerow([f"tender_{rng.randrange(tenders)}.pdf", synth.product_name(rng),
+                             rng.randint(40, 100), rng.randint(500, 500000), rng.choice(synth.CATEGORIES)])
+    return path
+
+
+def bench_parser(work, scales, repeat):
+    from agents.parser_agent import ParserAgent
+    results = {}
+    parser = ParserAgent(input_dir=work)
+    for pages in scales["pages"]:
+        pdf = synth.write_text_pdf(os.path.join(work, f"text_{pages}.pdf"), pages)
+        results[f"parser.extract_text[pages={pages}]"] = best_of(lambda: parser.extract_text(pdf), repeat)
+    return results
+
+
+def bench_ocr(work, scales, repeat):
+    from agents.ocr_agent import OcrAgent
+    results = {}
+    agent = OcrAgent(input_dir=work, output_dir=os.path.join(work, "ocr_out"))
+    for pages in scales["pages"]:
+        pdf = os.path.join(work, f"text_{pages}.pdf")
+        if not os.path.exists(pdf):
+            synth.write_text_pdf(pdf, pages)
+        results[f"ocr.has_text[pages={pages}]"] = best_of(lambda: agent.has_text(pdf), repeat)
+
+    if shutil.which("tesseract") is None:
+        print("⚠️  tesseract not found; skipping run_ocr benchmarks")
+        return results
+    for pages in scales["ocr_pages"]:
+        pdf = synth.write_image_pdf(os.path.join(work, f"image_{pages}.pdf"), pages)
+
+        def run_ocr():
+            # Drop earlier output so every repeat really OCRs.
+            shutil.rmtree(agent.output_dir, ignore_errors=True)
+            os.makedirs(agent.output_dir, exist_ok=True)
+            agent.run_ocr(pdf)
+        results[f"ocr.run_ocr[pages={pages}]"] = best_of(run_ocr, 1)
+    agent.close()
+    return results
+
+
+def bench_technical(work, scales, repeat):
+    from agents.matcher_service import MatcherService
+    from agents.technical_agent import TechnicalAgent
+    results = {}
+    parsed = synth.write_parsed_csv(os.path.join(work, "parsed_rfps.csv"), scales["tenders"])
+    for rows in scales["catalogue"]:
+        products = synth.write_catalogue(os.path.join(work, f"products_{rows}.csv"), rows)
+        agent = TechnicalAgent(parsed_csv=parsed, products_csv=products)
+        key = f"technical.run[tenders={scales['tenders']},skus={rows}]"
+        results[key] = best_of(lambda: agent.run(threshold=40), repeat)
+        key = f"technical.run[method=tfidf,tenders={scales['tenders']},skus={rows}]"
+        agent.prepare("tfidf")  # fitted once per catalogue, like the on-disk index
+        results[key] = best_of(lambda: agent.run(threshold=40, method="tfidf"), repeat)
+
+        # Resident service: one tender per request against the memory-mapped catalogue.
+        service = MatcherService(products)
+        text = agent.rfps["Extracted_Text"].iloc[0]
+        results[f"matcher.match[skus={rows}]"] = best_of(lambda: service.match("tender.pdf", text), repeat)
+    return results
+
+
+def bench_pricing(work, scales, repeat):
+    from agents.pricing_agent import PricingAgent
+    results = {}
+    parsed = synth.write_parsed_csv(os.path.join(work, "parsed_rfps.csv"), scales["tenders"])
+    for rows in scales["matches"]:
+        matches = write_matches_csv(os.path.join(work, f"matches_{rows}.csv"), rows, scales["tenders"])
+        agent = PricingAgent(matches_csv=matches, parsed_csv=parsed,
+                             out_xlsx=os.path.join(work, f"bid_pricing_{rows}.xlsx"))
+        results[f"pricing.run[matches={rows}]"] = best_of(lambda: agent.run(margin_pct=10), repeat)
+    return results
+
+
+def bench_report(work, scales, repeat):
+    from agents.report_agent import ReportAgent
+    results = {}
+    out_dir = synth.ensure_dir(os.path.join(work, "reports"))
+    agent = ReportAgent(out_dir=out_dir)
+    rng = random.Random(0)
+    for rows in scales["report_rows"]:
+        items = [{"Product_Name": synth.product_name(rng), "Base_Price": rng.randint(500, 500000),
+                  "Bid_Price": rng.randint(500, 550000)} for _ in range(rows)]
+        payload = {"items": items, "summary": {"Items": rows}}
+        results[f"report.run[rows={rows}]"] = best_of(
+            lambda: agent.run(payload, rfp_meta={"title": "bench"}, company_meta={},
+                              out_basename=f"bench_{rows}"), repeat)
+
+    proposals = scales["proposals"]
+    jobs = [{"payload": {"items": [{"Product_Name": synth.product_name(rng), "Base_Price": rng.randint(500, 500000),
+                                    "Bid_Price": rng.randint(500, 550000)} for _ in range(50)],
+                         "summary": {"Items": 50}},
+             "rfp_meta": {"title": f"bench tender {i}"}} for i in range(proposals)]
+    results[f"report.run_batch[proposals={proposals}]"] = best_of(
+        lambda: agent.run_batch(jobs, consolidated=os.path.join(out_dir, "consolidated.xlsx")), repeat)
+    return results
+
+
+BENCHMARKS = {
+    "parser": bench_parser,
+    "ocr": bench_ocr,
+    "technical": bench_technical,
+    "pricing": bench_pricing,
+    "report": bench_report,
+}
+
+
+def compare(results, baseline, threshold):
+    """Return [(name, current, baseline, ratio)] for benchmarks slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None or base <= 0:
+            print(f"🆕 {name}: {seconds:.4f}s (not in baseline)")
+            continue
+        ratio = seconds / base
+        marker = "❌" if ratio > 1 + threshold else "✅"
+        print(f"{marker} {name}: {seconds:.4f}s vs {base:.4f}s ({ratio:.2f}x)")
+        if ratio > 1 + threshold:
+            regressions.append((name, seconds, base, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="use small scales")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the best is kept")
+    parser.add_argument("--out", default=os.path.join(HERE, "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(HERE, "baseline.json"))
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown vs baseline before failing (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline too")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="exit 0 instead of 2 when --baseline does not exist")
+    args = parser.parse_args(argv)
+
+    scales = QUICK_SCALES if args.quick else FULL_SCALES
+    results = {}
+    work = tempfile.mkdtemp(prefix="rfp-bench-")
+    try:
+        for name in args.only or BENCHMARKS:
+            print(f"\n⏱️  {name}")
+            results.update(BENCHMARKS[name](synth.ensure_dir(os.path.join(work, name)), scales, args.repeat))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved: {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️  No baseline at {args.baseline}: nothing was compared.")
+        print("   Record one on this machine with --save-baseline (add --quick to match these scales).")
+        return 0 if args.allow_missing_baseline else 2
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("quick") != args.quick:
+        print("⚠️  Baseline was recorded at different scales (--quick); only shared benchmarks are compared.")
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# benchmarks/synth.py
+"""Deterministic synthetic inputs for the benchmarks: tender PDFs and SKU catalogues."""
+import csv
+import os
+import random
+
+import fitz
+
+NOUNS = ["cable", "transformer", "switchgear", "breaker", "meter", "panel", "conductor",
+         "insulator", "relay", "battery", "inverter", "charger", "pump", "motor", "valve",
+         "pipe", "luminaire", "pole", "busbar", "capacitor"]
+ADJECTIVES = ["armoured", "copper", "aluminium", "xlpe", "pvc", "outdoor", "indoor", "led",
+              "three-phase", "single-phase", "high-voltage", "low-voltage", "flameproof", "smart"]
+CATEGORIES = ["Cables", "Power", "Protection", "Metering", "Lighting", "Mechanical", "Storage"]
+BOILERPLATE = [
+    "Bids shall be submitted online through the e-procurement portal.",
+    "The bidder shall furnish all documents as per the eligibility criteria.",
+    "Technical specifications are given in Section IV of this document.",
+    "Delivery shall be completed within 90 days from the date of purchase order.",
+    "The purchaser reserves the right to reject any or all bids without assigning reasons.",
+]
+
+
+def product_name(rng):
+    return (f"{rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} "
+            f"{rng.randint(1, 400)}{rng.choice(['kv', 'a', 'sqmm', 'w', 'kva'])}")
+
+
+def write_catalogue(path, rows, seed=0):
+    """products.csv with Product_Name, Category, Base_Price columns."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Product_Name", "Category", "Base_Price"])
+        for _ in range(rows):
+            writer.writerow([product_name(rng), rng.choice(CATEGORIES), rng.randint(500, 500000)])
+    return path
+
+
+def tender_lines(rng, lines=40):
+    out = ["NOTICE INVITING TENDER",
+           f"Tender Fee: Rs. {rng.randint(1, 20) * 500:,}/-",
+           f"EMD: Rs. {rng.randint(1, 50) / 10} Lakh",
+           f"Bid Due Date: {rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2026"]
+    for _ in range(lines):
+        if rng.random() < 0.4:
+            out.append(f"Supply of {product_name(rng)} as per specification.")
+        else:
+            out.append(rng.choice(BOILERPLATE))
+    return out
+
+
+def tender_text(seed=0, lines=40):
+    return "\n".join(tender_lines(random.Random(seed), lines))
+
+
+def write_text_pdf(path, pages, seed=0):
+    """PDF with a real text layer on every page."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 60), "\n".join(tender_lines(rng)), fontsize=9)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def write_image_pdf(path, pages, seed=0, dpi=150):
+    """Image-only PDF: each text page is rasterized and re-inserted as a picture."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        src = fitz.open()
+        src_page = src.new_page()
+        src_page.insert_text((50, 60), "\n".join(tender_lines(rng)), fontsize=9)
+        pix = src_page.get_pixmap(dpi=dpi)
+        page = doc.new_page(width=src_page.rect.width, height=src_page.rect.height)
+        page.insert_image(page.rect, pixmap=pix)
+        src.close()
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def write_parsed_csv(path, tenders, seed=0):
+    """parsed_rfps.csv in the format main.py writes (Filename, Extracted_Text)."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Filename", "Extracted_Text", "Tender_Fee", "EMD"])
+        for i in range(tenders):
+            text = tender_text(seed + i)
+            lines = text.split("\n")
+            writer.writerow([f"tender_{i}.pdf", text, lines[1], lines[2]])
+    return path
+
+
+def ensure_dir(path):
+    os.makedirs(path, exist_ok=True)
+    return path
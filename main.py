@@ -1,141 +1,354 @@
 # =====================================
 # main.py — EY Techathon End-to-End Demo
 # =====================================
+"""
+RFP automation pipeline, one subcommand per step:
 
-# --- Imports ---
-import os
+    python main.py crawl --portal URL     # find tender PDFs on a portal
+    python main.py download [--url URL]   # download PDFs (crawled links, or the demo links)
+    python main.py ocr                    # make scanned PDFs searchable
+    python main.py parse                  # extract text/fields into the store + keyword stats
+    python main.py match                  # match tenders to SKUs
+    python main.py price                  # price the matches
+    python main.py report                 # write one proposal per tender
+    python main.py all                    # every step above, once each
+
+Each step reads the previous step's output from data/ (the Parquet store and
+JSON files), so steps can be re-run on their own. Agents are imported inside
+the step that needs them: `match` never loads the browser or OCR stack.
+"""
+
+# --- Imports (heavy ones are inside the steps) ---
+import argparse
 import csv
-import pandas as pd
-from agents.scraper_agent_playwright import download_pdf_playwright
-from agents.parser_agent import ParserAgent
-from agents.technical_agent import TechnicalAgent
-from agents.ocr_agent import OcrAgent
-from sklearn.feature_extraction.text import CountVectorizer
-
-# --- Step 1: Define folders ---
-DATA_DIR = "data"
-RFP_DIR = os.path.join(DATA_DIR, "rfps")
-PARSED_CSV = os.path.join(DATA_DIR, "parsed_rfps.csv")
-os.makedirs(RFP_DIR, exist_ok=True)
-
-# --- Step 2: Verified public PDF URLs ---
-pdf_links = [
+import json
+import os
+import sys
+from datetime import date
+from urllib.parse import urlparse
+
+# --- Verified public PDF URLs (used when nothing was crawled) ---
+DEMO_PDF_LINKS = [
     "https://epi.gov.in/admin/image/tenders/1709123994_NITETS202.pdf",
     "https://education.gov.in/sites/upload_files/mhrd/files/tenders/tender.pdf",
     "https://www.iitk.ac.in/dord/tender/tender_document.pdf"
 ]
 
-# --- Step 2.5: OCR Agent (convert scanned PDFs to text-based PDFs) ---
-print("\n==============================")
-print("👁️  STEP 2.5: Running OCR on downloaded PDFs")
-print("==============================\n")
-
-ocr_agent = OcrAgent(input_dir=RFP_DIR)
-processed_files = ocr_agent.run()
-
-# --- Step 3: Download the PDFs ---
-print("\n==============================")
-print("📥 STEP 3: Downloading Tender PDFs")
-print("==============================\n")
-
-downloaded_files = []
-for link in pdf_links:
-    print(f"➡️  Attempting to download: {link}")
-    path = download_pdf_playwright(link, out_dir=RFP_DIR, headless=True)
-    if path:
-        downloaded_files.append(path)
-    else:
-        print(f"⚠️  Failed to download: {link}")
-
-# --- Step 4: Extract text using ParserAgent ---
-print("\n==============================")
-print("📄 STEP 4: Extracting Text from PDFs")
-print("==============================\n")
-
-parser = ParserAgent(input_dir=RFP_DIR)
-parsed_data = parser.run()
-
-# --- Step 5: Save parsed text to CSV ---
-print("\n==============================")
-print("💾 STEP 5: Saving Extracted Data to CSV")
-print("==============================\n")
-
-os.makedirs(DATA_DIR, exist_ok=True)
-with open(PARSED_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(["Filename", "Extracted_Text"])
-    for item in parsed_data:
-        writer.writerow([item["file"], item["text"]])
-
-print(f"✅ CSV saved: {PARSED_CSV}")
-
-# --- Step 6: NLP Analysis on Extracted Text ---
-print("\n==============================")
-print("🧠 STEP 6: NLP Analysis on Extracted PDF Text")
-print("==============================\n")
-
-# Read parsed text from CSV
-parsed_df = pd.read_csv(PARSED_CSV)
-text_content = " ".join(parsed_df["Extracted_Text"].astype(str).tolist())
-
-# --- Keyword Extraction ---
-vectorizer = CountVectorizer(stop_words='english')
-word_counts = vectorizer.fit_transform([text_content])
-words = vectorizer.get_feature_names_out()
-frequencies = word_counts.toarray()[0]
-word_freq = sorted(zip(words, frequencies), key=lambda x: x[1], reverse=True)[:10]
-
-print("\n🔍 Top Keywords Found in Extracted PDFs:")
-for word, freq in word_freq:
-    print(f"- {word}: {freq}")
-
-# --- Simple Insight Extraction ---
-summary_lines = [line for line in text_content.split("\n") if "-" in line or line.strip().startswith(("1.", "2.", "3.", "4.", "5."))]
-print("\n🧩 Extracted Key Insights from PDFs:")
-for line in summary_lines[:10]:
-    print(line)
-
-# --- Save NLP Insights ---
-NLP_CSV = os.path.join(DATA_DIR, "pdf_insights.csv")
-with open(NLP_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(["Keyword", "Frequency"])
-    writer.writerows(word_freq)
-
-print(f"\n✅ NLP insights saved: {NLP_CSV}")
-
-# --- Step 7: Technical Matching ---
-print("\n==============================")
-print("🧩 STEP 7: Matching Tender Specs to Internal SKUs")
-print("==============================\n")
-
-tech_agent = TechnicalAgent(
-    parsed_csv=PARSED_CSV,
-    products_csv=os.path.join(DATA_DIR, "products.csv")
-)
-matched_df = tech_agent.run(threshold=40)
-
-print(f"\n✅ Found {len(matched_df)} total matches saved in data/matched_tenders.csv")
-
-# --- Step 8: Final Summary ---
-print("\n==============================")
-print("🏁 PROCESS COMPLETE")
-print("==============================\n")
-
-if downloaded_files:
-    print(f"✅ {len(downloaded_files)} PDF(s) downloaded, parsed, and analyzed successfully.")
-else:
-    print("❌ No PDFs were downloaded. Check links or network.")
-
-print("\nNext Step: Feed parsed_rfps.csv and pdf_insights.csv into your TechnicalAgent and PricingAgent 🔄")
-
-# --- STEP 4: Technical Agent ---
-from agents.technical_agent import TechnicalAgent
-tech = TechnicalAgent(parsed_csv="data/parsed_rfps.csv", products_csv="data/products.csv")
-matched_df = tech.run(threshold=40)
-
-# --- STEP 5: Pricing Agent ---
-from agents.pricing_agent import PricingAgent
-price = PricingAgent(matches_csv="data/matched_tenders.csv",
-                     parsed_csv="data/parsed_rfps.csv")
-price_df = price.run(margin_pct=10)
+STEPS = ["crawl", "download", "ocr", "parse", "match", "price", "report"]
+
+
+def banner(title):
+    print("\n==============================")
+    print(title)
+    print("==============================\n")
+
+
+class Context:
+    """Folders and shared resources for one invocation; the cache and store are opened on first use."""
+
+    def __init__(self, args):
+        self.args = args
+        self.data_dir = args.data_dir
+        self.rfp_dir = os.path.join(self.data_dir, "rfps")
+        self.crawled_json = os.path.join(self.data_dir, "crawled_rfps.json")
+        self.downloads_json = os.path.join(self.data_dir, "downloads.json")
+        self.ledger_path = os.path.join(self.data_dir, "crawl_ledger.sqlite")
+        self.products_csv = args.products or os.path.join(self.data_dir, "products.csv")
+        self.crawl_date = args.crawl_date or date.today().isoformat()
+        self._cache = None
+        self._store = None
+        self._registry = None
+        self._ledger = None
+        os.makedirs(self.rfp_dir, exist_ok=True)
+
+    @property
+    def cache(self):
+        # Shared extraction cache: unchanged PDFs skip re-extraction and re-OCR
+        if self._cache is None:
+            from agents.extraction_cache import ExtractionCache
+            self._cache = ExtractionCache(path=os.path.join(self.data_dir, "cache", "extraction.sqlite"))
+        return self._cache
+
+    @property
+    def registry(self):
+        # Document identity: content-hashed downloads, URL -> hash, near-duplicate detection
+        if self._registry is None:
+            from agents.doc_identity import DocRegistry
+            self._registry = DocRegistry(path=os.path.join(self.data_dir, "doc_registry.sqlite"))
+        return self._registry
+
+    @property
+    def ledger(self):
+        # Crawl ledger: incremental crawls; tenders count as done only once their PDFs are parsed
+        if self._ledger is None:
+            from agents.crawl_ledger import CrawlLedger
+            self._ledger = CrawlLedger(path=self.ledger_path)
+        return self._ledger
+
+    @property
+    def store(self):
+        # Columnar hand-off store (Parquet, partitioned by crawl date) between the steps
+        if self._store is None:
+            from agents.columnar_store import TenderStore
+            self._store = TenderStore(root=os.path.join(self.data_dir, "store"))
+            legacy_csv = os.path.join(self.data_dir, "parsed_rfps.csv")
+            if not self._store.exists("parsed_rfps") and os.path.exists(legacy_csv):
+                self._store.migrate_csv(legacy_csv, "parsed_rfps", crawl_date=self.crawl_date)
+        return self._store
+
+    def close(self):
+        if self._ledger is not None:
+            self._ledger.close()
+        if self._registry is not None:
+            self._registry.close()
+        if self._cache is not None:
+            stats = self._cache.stats()
+            print(f"♻️  Extraction cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['bytes_saved'] / 1e6:.1f} MB of PDFs not re-processed")
+            self._cache.close()
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# --- Step 1: Crawl portals for tender PDFs ---
+def step_crawl(ctx):
+    banner("🔍 STEP 1: Crawling tender portals")
+    if not ctx.args.portal:
+        print("ℹ️  No --portal given; download will use the demo links.")
+        return
+    from agents.scrapper_agent import ScraperAgent
+
+    scraper = ScraperAgent()
+    rfps = []
+    for portal in ctx.args.portal:
+        rfps.extend(scraper.run_async(portal, max_tenders=ctx.args.max_tenders, ledger=ctx.ledger,
+                                      recheck_processed=ctx.args.recheck)["payload"])
+    save_json(ctx.crawled_json, rfps)
+    print(f"✅ {len(rfps)} new, changed or unfinished tender PDF link(s) saved: {ctx.crawled_json}")
+
+
+# --- Step 2: Download the PDFs ---
+def step_download(ctx):
+    banner("📥 STEP 2: Downloading Tender PDFs")
+    from agents.scraper_agent_playwright import PlaywrightDownloader
+
+    links = ctx.args.url or [r["pdf_url"] for r in load_json(ctx.crawled_json, [])] or DEMO_PDF_LINKS
+    downloads = load_json(ctx.downloads_json, {})  # file name -> URL, for per-portal stats
+    downloader = PlaywrightDownloader(out_dir=ctx.rfp_dir, headless=True, ocr=False,
+                                      registry=ctx.registry, ledger=ctx.ledger)
+    ok = 0
+    for link, path in downloader.run(links).items():
+        if path:
+            downloads[os.path.basename(path)] = link
+            ok += 1
+        else:
+            print(f"⚠️  Failed to download: {link}")
+    save_json(ctx.downloads_json, downloads)
+    print(f"✅ {ok}/{len(links)} PDF(s) downloaded")
+
+
+# --- Step 3: OCR Agent (convert scanned PDFs to text-based PDFs) ---
+def step_ocr(ctx):
+    banner("👁️  STEP 3: Running OCR on downloaded PDFs")
+    from agents.ocr_agent import OcrAgent
+
+    with OcrAgent(input_dir=ctx.rfp_dir, cache=ctx.cache) as ocr_agent:
+        ocr_agent.run()
+
+
+# --- Step 4: Extract text and fields into the store, then keyword stats ---
+def step_parse(ctx):
+    banner("📄 STEP 4: Extracting Text from PDFs")
+    import pandas as pd
+    from agents.parser_agent import ParserAgent
+
+    parsed_data = ParserAgent(input_dir=ctx.rfp_dir, cache=ctx.cache, registry=ctx.registry).run()
+    parsed_frame = pd.DataFrame(
+        [[item["file"], item["text"], item["fields"].tender_fee, item["fields"].emd,
+          item["fields"].bid_due_date, item["fields"].opening_date, item["fields"].spec_text,
+          item["duplicate_of"]]
+         for item in parsed_data],
+        columns=["Filename", "Extracted_Text", "Tender_Fee", "EMD",
+                 "Bid_Due_Date", "Opening_Date", "Spec_Text", "Duplicate_Of"])
+    part = ctx.store.append("parsed_rfps", parsed_frame, crawl_date=ctx.crawl_date)
+    print(f"✅ {len(parsed_frame)} tender(s) parsed; Parquet part saved: {part}")
+    mark_crawled_done(ctx, [item["file"] for item in parsed_data])
+    keyword_insights(ctx)
+
+
+def mark_crawled_done(ctx, files):
+    """Tell the crawl ledger which downloads made it through parsing; the rest are re-crawled."""
+    if not os.path.exists(ctx.ledger_path):
+        return
+    done = set()
+    for file in files:
+        done.update(ctx.ledger.mark_pdf_processed(content_hash=ctx.cache.digest(os.path.join(ctx.rfp_dir, file))))
+    if done:
+        print(f"📒 {len(done)} tender(s) fully processed")
+
+
+def keyword_insights(ctx):
+    banner("🧠 STEP 4b: NLP Analysis on Extracted PDF Text")
+    from agents.keyword_stats import KeywordStats
+
+    # Read only the text column of this crawl date's partition
+    parsed_df = ctx.store.read("parsed_rfps", columns=["Filename", "Extracted_Text", "Duplicate_Of"],
+                               crawl_date=ctx.crawl_date, dedupe_on="Filename")
+    if "Duplicate_Of" in parsed_df.columns:  # count each document once
+        parsed_df = parsed_df[parsed_df["Duplicate_Of"].isna()]
+    texts = parsed_df["Extracted_Text"].astype(str).tolist()
+    files = parsed_df["Filename"].tolist()
+    downloads = load_json(ctx.downloads_json, {})
+
+    # --- Keyword Extraction (incremental: only tenders not seen before are counted) ---
+    keyword_stats = KeywordStats(root=os.path.join(ctx.data_dir, "keywords"))
+    added = keyword_stats.add(files, texts, [urlparse(downloads[f]).netloc if f in downloads else None
+                                             for f in files])
+    keyword_stats.save()
+    print(f"➕ {added} new tender(s) added to keyword stats ({len(keyword_stats)} total)")
+    word_freq = [(word, int(freq)) for word, freq in keyword_stats.top_overall(10)]
+
+    print("\n🔍 Top Keywords Found in Extracted PDFs:")
+    for word, freq in word_freq:
+        print(f"- {word}: {freq}")
+
+    for portal in sorted(set(keyword_stats.portals)):
+        top = ", ".join(word for word, _ in keyword_stats.top_for_portal(portal, 5))
+        print(f"🌐 {portal}: {top}")
+
+    # --- Simple Insight Extraction ---
+    summary_lines = [line for text in texts for line in text.split("\n")
+                     if "-" in line or line.strip().startswith(("1.", "2.", "3.", "4.", "5."))]
+    print("\n🧩 Extracted Key Insights from PDFs:")
+    for line in summary_lines[:10]:
+        print(line)
+
+    # --- Save NLP Insights ---
+    nlp_csv = os.path.join(ctx.data_dir, "pdf_insights.csv")
+    with open(nlp_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Keyword", "Frequency"])
+        writer.writerows(word_freq)
+    print(f"\n✅ NLP insights saved: {nlp_csv}")
+
+
+# --- Step 5: Technical Matching ---
+def step_match(ctx):
+    banner("🧩 STEP 5: Matching Tender Specs to Internal SKUs")
+    from agents.technical_agent import TechnicalAgent
+
+    tech = TechnicalAgent(products_csv=ctx.products_csv, store=ctx.store, crawl_date=ctx.crawl_date)
+    matched_df = tech.run(threshold=ctx.args.threshold, method=ctx.args.method)
+    ctx.store.replace("matches", matched_df, crawl_date=ctx.crawl_date)
+    print(f"\n✅ Found {len(matched_df)} total matches")
+
+
+# --- Step 6: Pricing Agent ---
+def step_price(ctx):
+    banner("💰 STEP 6: Pricing matched SKUs")
+    from agents.pricing_agent import PricingAgent
+
+    price = PricingAgent(out_xlsx=os.path.join(ctx.data_dir, "bid_pricing.xlsx"),
+                         store=ctx.store, crawl_date=ctx.crawl_date)
+    price_df = price.run(margin_pct=ctx.args.margin)
+    ctx.store.replace("priced", price_df, crawl_date=ctx.crawl_date)
+
+
+# --- Step 7: One proposal per tender ---
+def step_report(ctx):
+    banner("📑 STEP 7: Writing proposals")
+    from agents.report_agent import ReportAgent
+
+    priced = ctx.store.read("priced", crawl_date=ctx.crawl_date)
+    meta = ctx.store.read("parsed_rfps", columns=["Filename", "Bid_Due_Date"],
+                          crawl_date=ctx.crawl_date, dedupe_on="Filename")
+    due_dates = dict(zip(meta["Filename"], meta["Bid_Due_Date"]))
+    jobs = []
+    for tender, items in priced.groupby("Tender_File", sort=True):
+        total_col = "Total_Estimate" if "Total_Estimate" in items.columns else None
+        jobs.append({
+            "payload": {
+                "items": items.to_dict("records"),
+                "summary": {"Items": len(items),
+                            "Total_Estimate": float(items[total_col].sum()) if total_col else 0.0},
+            },
+            "rfp_meta": {"title": tender, "due_date": due_dates.get(tender)},
+        })
+    out_dir = os.path.join(ctx.data_dir, "output")
+    consolidated = os.path.join(out_dir, f"proposals_{ctx.crawl_date}.xlsx")
+    results = ReportAgent(out_dir=out_dir).run_batch(jobs, consolidated=consolidated)
+    print(f"✅ {len(results)} proposal(s) written to {out_dir} (consolidated: {consolidated})")
+
+
+STEP_FUNCTIONS = {
+    "crawl": step_crawl,
+    "download": step_download,
+    "ocr": step_ocr,
+    "parse": step_parse,
+    "match": step_match,
+    "price": step_price,
+    "report": step_report,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--crawl-date", help="store partition to read/write (default: today)")
+    parser.add_argument("--no-metrics", action="store_true", help="skip the stage timing summary")
+    # Options of steps that a subcommand doesn't run still need a value.
+    parser.set_defaults(portal=None, max_tenders=None, url=None, products=None,
+                        recheck=False, threshold=40, method="cdist", margin=10)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    commands = {name: sub.add_parser(name) for name in STEPS + ["all"]}
+    for name in ("crawl", "all"):
+        commands[name].add_argument("--portal", action="append", help="portal listing URL (repeatable)")
+        commands[name].add_argument("--max-tenders", type=int, default=None)
+        commands[name].add_argument("--recheck", action="store_true",
+                                    help="re-fetch processed tenders (conditionally) to catch changes")
+    for name in ("download", "all"):
+        commands[name].add_argument("--url", action="append", help="PDF URL to download (repeatable)")
+    for name in ("match", "all"):
+        commands[name].add_argument("--products", default=None, help="SKU catalogue CSV")
+        commands[name].add_argument("--threshold", type=int, default=40)
+        commands[name].add_argument("--method", choices=["cdist", "index", "tfidf"], default="cdist")
+    for name in ("price", "all"):
+        commands[name].add_argument("--margin", type=float, default=10)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ctx = Context(args)
+    steps = STEPS if args.command == "all" else [args.command]
+    try:
+        for step in steps:
+            STEP_FUNCTIONS[step](ctx)
+    finally:
+        ctx.close()
+        if not args.no_metrics:
+            from agents.metrics import metrics
+            # --- Instrumentation summary ---
+            banner("⏱️  Stage timings")
+            print(metrics.summary_table())
+            metrics.to_jsonl(os.path.join(ctx.data_dir, "metrics.jsonl"))
+            metrics.write_prometheus(os.path.join(ctx.data_dir, "metrics.prom"))
+    banner("🏁 PROCESS COMPLETE")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
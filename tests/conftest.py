@@ -0,0 +1,38 @@
+# tests/conftest.py
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "portal")
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the fixture portal and records when each request arrived."""
+
+    def do_GET(self):
+        self.server.hits.append((time.monotonic(), self.path))
+        if self.path.startswith(("/TenderDocuments", "/download", "/docs/")):
+            # Documents are never downloaded by the crawler; only links are extracted.
+            self.send_error(404)
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def portal():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(FixtureHandler, directory=FIXTURES))
+    server.hits = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,39 @@
+# tests/test_columnar_store.py
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from agents.columnar_store import TenderStore
+
+
+def test_migrated_legacy_csv_does_not_hide_later_columns(tmp_path):
+    store = TenderStore(root=str(tmp_path / "store"))
+    legacy = tmp_path / "parsed_rfps.csv"
+    pd.DataFrame({"Filename": ["old.pdf"], "Extracted_Text": ["legacy text"],
+                  "Tender_Fee": ["Rs. 1.5 Lakh"]}).to_csv(legacy, index=False)
+    store.migrate_csv(str(legacy), "parsed_rfps", crawl_date="2024-01-01")
+    store.append("parsed_rfps", pd.DataFrame({
+        "Filename": ["new.pdf"], "Extracted_Text": ["text"], "Tender_Fee": [2000.0], "EMD": [None],
+        "Bid_Due_Date": ["2024-02-01"], "Opening_Date": [None], "Spec_Text": ["cables"],
+        "Duplicate_Of": [None]}), crawl_date="2024-01-01")
+
+    df = store.read("parsed_rfps", columns=["Filename", "Tender_Fee", "EMD", "Spec_Text", "Duplicate_Of"],
+                    crawl_date="2024-01-01", dedupe_on="Filename").set_index("Filename")
+
+    assert list(df.columns) == ["Tender_Fee", "EMD", "Spec_Text", "Duplicate_Of"]
+    assert df.loc["old.pdf", "Tender_Fee"] == 150000.0
+    assert df.loc["new.pdf", "Tender_Fee"] == 2000.0
+    assert df.loc["new.pdf", "Spec_Text"] == "cables"
+    assert pd.isna(df.loc["old.pdf", "Spec_Text"])
+
+
+def test_parts_with_null_and_numeric_columns_read_together(tmp_path):
+    store = TenderStore(root=str(tmp_path / "store"))
+    store.append("matches", pd.DataFrame({"Tender_File": ["a.pdf"], "Match_Score": [None]}), crawl_date="2024-01-01")
+    store.append("matches", pd.DataFrame({"Tender_File": ["b.pdf"], "Match_Score": [90]}), crawl_date="2024-01-01")
+    store.append("matches", pd.DataFrame({"Tender_File": ["c.pdf"], "Match_Score": [85.5]}), crawl_date="2024-01-02")
+
+    df = store.read("matches", columns=["Tender_File", "Match_Score"])
+    assert sorted(df["Match_Score"].dropna().tolist()) == [85.5, 90.0]
+    assert len(df) == 3
@@ -0,0 +1,45 @@
+# tests/test_crawl_engine.py
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from agents.scrapper_agent import ScraperAgent
+
+
+def test_run_async_follows_pagination_and_extracts_pdf_links(portal):
+    server, base = portal
+    result = ScraperAgent().run_async(f"{base}/listing.html", rate_per_host=50, concurrency=4)
+
+    assert result["status"] == "ok"
+    assert {r["pdf_url"] for r in result["payload"]} == {
+        f"{base}/docs/cables-nit.pdf",
+        f"{base}/TenderDocuments?id=101",
+        f"{base}/download?doc=202",
+        f"{base}/docs/poles.PDF",
+    }
+    # Each listing and tender page is fetched once; duplicate and non-tender links are not.
+    assert sorted(path for _, path in server.hits) == [
+        "/TenderDetails1.html", "/TenderDetails2.html", "/TenderDetails3.html",
+        "/listing.html", "/listing2.html",
+    ]
+
+
+def test_run_async_respects_per_host_rate(portal):
+    server, base = portal
+    rate = 5.0
+    ScraperAgent().run_async(f"{base}/listing.html", rate_per_host=rate, burst=1, concurrency=8)
+
+    times = sorted(t for t, _ in server.hits)
+    assert len(times) == 5
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    # One token every 1/rate seconds; allow some scheduling jitter.
+    assert min(gaps) >= 0.75 / rate
+    assert times[-1] - times[0] >= 0.75 * (len(times) - 1) / rate
+
+
+def test_max_tenders_limits_detail_pages(portal):
+    server, base = portal
+    ScraperAgent().run_async(f"{base}/listing.html", max_tenders=1, rate_per_host=50)
+
+    assert len([path for _, path in server.hits if "TenderDetails" in path]) == 1
@@ -0,0 +1,53 @@
+# tests/test_crawl_ledger.py
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from agents.crawl_ledger import CrawlLedger
+from agents.scrapper_agent import ScraperAgent
+
+
+def crawl(base, ledger):
+    result = ScraperAgent().run_async(f"{base}/listing.html", ledger=ledger, rate_per_host=50)
+    return {r["pdf_url"]: r["change"] for r in result["payload"]}
+
+
+def test_unfinished_tenders_are_emitted_again_until_processed(portal, tmp_path):
+    _, base = portal
+    ledger = CrawlLedger(path=str(tmp_path / "ledger.sqlite"))
+
+    first = crawl(base, ledger)
+    assert len(first) == 4 and "new" in first.values()
+    assert not any(ledger.is_processed(f"{base}/TenderDetails{n}.html") for n in (1, 2, 3))
+
+    # Nothing was reported done downstream: the next crawl resumes with the same PDFs.
+    second = crawl(base, ledger)
+    assert second == dict.fromkeys(first, "pending")
+
+    # Tender 3 links one PDF; once it is processed the tender is done and skipped.
+    assert ledger.mark_pdf_processed(url=f"{base}/docs/poles.PDF") == [f"{base}/TenderDetails3.html"]
+    third = crawl(base, ledger)
+    assert f"{base}/docs/poles.PDF" not in third
+    assert set(third) == set(first) - {f"{base}/docs/poles.PDF"}
+
+    for url in third:
+        ledger.mark_pdf_processed(url=url)
+    assert crawl(base, ledger) == {}
+    ledger.close()
+
+
+def test_mark_pdf_processed_by_content_hash(tmp_path):
+    ledger = CrawlLedger(path=str(tmp_path / "ledger.sqlite"))
+    ledger.record_page("https://portal/t1")
+    ledger.record_pdf("https://portal/a.pdf", tender_url="https://portal/t1", content_hash="abc")
+    ledger.record_pdf("https://mirror/a.pdf", tender_url="https://portal/t1", content_hash="abc")
+
+    assert ledger.mark_pdf_processed(content_hash="abc") == ["https://portal/t1"]
+    assert ledger.is_pdf_processed("https://mirror/a.pdf")
+    assert ledger.is_processed("https://portal/t1")
+
+    # New bytes behind a processed URL must be processed again.
+    assert ledger.record_pdf("https://portal/a.pdf", content_hash="def")
+    assert not ledger.is_pdf_processed("https://portal/a.pdf")
+    ledger.close()
@@ -0,0 +1,60 @@
+# tests/test_field_extractor.py
+from agents.field_extractor import FieldExtractor, parse_date
+
+
+def extract(*pages, **options):
+    return FieldExtractor(**options).extract(list(pages), file="t.pdf")
+
+
+def test_amounts_and_dates():
+    record = extract("Tender Fee: Rs. 2,000/-\nEMD: Rs. 1.5 Lakh\n"
+                     "Last date of bid submission: 01-04-2025\nBid Opening Date: 3rd April, 2025")
+    assert record.tender_fee == 2000
+    assert record.emd == 150000
+    assert record.bid_due_date == "2025-04-01"
+    assert record.opening_date == "2025-04-03"
+
+
+def test_crore_amount():
+    assert extract("Earnest Money Deposit: 2 Cr").emd == 2e7
+
+
+def test_value_never_taken_from_the_next_label():
+    record = extract("Tender Fee: Exempted for MSEs\nEMD: Rs. 50,000")
+    assert record.tender_fee is None
+    assert record.emd == 50000
+
+    record = extract("Bid Opening Date: will be intimated later\nLast date of bid submission: 01-04-2025")
+    assert record.opening_date is None
+    assert record.bid_due_date == "2025-04-01"
+
+
+def test_value_on_the_line_after_its_label():
+    assert extract("Tender Fee\n  Rs. 1,180").tender_fee == 1180
+
+
+def test_spec_section_ends_at_next_heading_across_pages():
+    record = extract("Intro\nTechnical Specifications\nCable: 4 core, 16 sq mm",
+                     "Armoured, XLPE insulated\nTerms and Conditions\nPayment within 30 days")
+    assert len(record.spec_sections) == 1
+    assert "Armoured, XLPE insulated" in record.spec_text
+    assert "Payment" not in record.spec_text
+
+
+def test_spec_section_cut_at_max_chars():
+    record = extract("Scope of Work\n" + "x" * 500, max_spec_chars=100)
+    assert len(record.spec_text) <= len("Scope of Work") + 1 + 100
+
+
+def test_stops_reading_pages_once_everything_is_found():
+    fields = "Tender Fee: 500\nEMD: 1000\nBid submission end date: 01/04/2025\nTender opening date: 02/04/2025"
+    pages = [fields, "Bill of Quantities\nitem 1\nAnnexure A", "never read", "never read"]
+    assert extract(*pages).pages_scanned == 2
+    # Without a spec heading, reading stops after the page budget.
+    assert extract(fields, *["filler"] * 20, spec_page_budget=5).pages_scanned == 5
+
+
+def test_parse_date_formats():
+    assert parse_date("on 5 Jan 2025 at noon") == "2025-01-05"
+    assert parse_date("March 7, 2025") == "2025-03-07"
+    assert parse_date("no date here") is None
@@ -0,0 +1,33 @@
+# tests/test_matcher_service.py
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("rapidfuzz")
+
+from agents.matcher_service import MatcherService
+
+
+def write_products(path, names, mtime):
+    pd.DataFrame({"Product_Name": names, "Category": "Cable", "Base_Price": 100.0}).to_csv(path, index=False)
+    os.utime(path, (mtime, mtime))
+
+
+def test_index_match_after_reload_sees_new_rows(tmp_path):
+    csv = str(tmp_path / "products.csv")
+    write_products(csv, ["copper cable 4 core", "steel pole 9m"], mtime=1_000_000)
+    service = MatcherService(csv, reload_interval=3600, method="index")
+
+    # The CSV changes between reload checks; this match still uses the loaded catalogue
+    # (and builds its token index from it).
+    write_products(csv, ["copper cable 4 core", "steel pole 9m", "aluminium conductor dog"], mtime=2_000_000)
+    assert "aluminium conductor dog" not in service.match("t.pdf", "aluminium conductor dog")["Product_Name"].tolist()
+
+    service.reload_interval = 0
+    matched = service.match("t.pdf", "aluminium conductor dog")["Product_Name"].tolist()
+    assert "aluminium conductor dog" in matched
+
+    # A fresh process (new service) loads the persisted index for the new rows as well.
+    fresh = MatcherService(csv, method="index")
+    assert "aluminium conductor dog" in fresh.match("t.pdf", "aluminium conductor dog")["Product_Name"].tolist()